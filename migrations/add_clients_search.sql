@@ -0,0 +1,109 @@
+-- ============================================================================
+-- Migration: Server-side search and keyset pagination for the clients listing
+-- ============================================================================
+-- Purpose:
+--   ClientsTable.jsx used to select('*') from every client and filter in the
+--   browser. This adds:
+--     - search_tsv: a generated tsvector over first/last name and email
+--       (whole address plus its parts, so "smith" finds john.smith@x.com)
+--     - a (created_at desc, id desc) index for keyset pagination
+--     - search_clients(): one indexed query returning a page of the narrow
+--       listing projection
+--
+-- Usage from the app (src/utils/clientQueries.js):
+--   supabase.rpc('search_clients', { p_query, p_after_created_at, p_after_id, p_limit })
+--   Pass the created_at/id of the last row of a page to get the next page.
+--
+-- Run this in your Supabase SQL editor or database console
+-- ============================================================================
+
+ALTER TABLE clients ADD COLUMN IF NOT EXISTS search_tsv tsvector
+  GENERATED ALWAYS AS (
+    to_tsvector('simple',
+      coalesce(first_name, '') || ' ' ||
+      coalesce(last_name, '') || ' ' ||
+      coalesce(email, '') || ' ' ||
+      regexp_replace(coalesce(email, ''), '[^[:alnum:]]+', ' ', 'g'))
+  ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_clients_search_tsv ON clients USING GIN (search_tsv);
+
+-- Keyset pagination: WHERE (created_at, id) < (:last_created_at, :last_id) ORDER BY created_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_clients_created_id ON clients (created_at DESC, id DESC);
+
+COMMENT ON COLUMN clients.search_tsv IS 'Generated search vector over name and email; used by search_clients().';
+
+-- Turn free text into a prefix tsquery: 'jo smi' -> 'jo':* & 'smi':*
+create or replace function clients_search_query(p_query text)
+returns tsquery
+language sql
+immutable
+as $$
+  select case
+    when count(*) = 0 then null
+    else to_tsquery('simple', string_agg(quote_literal(token) || ':*', ' & '))
+  end
+  from regexp_split_to_table(lower(coalesce(p_query, '')), '[^[:alnum:]]+') as token
+  where token <> '';
+$$;
+
+-- One page of the clients listing, newest first.
+-- Each filter combination is its own statement so every plan can use the
+-- matching index (no "param is null or ..." predicates).
+-- Runs with the caller's privileges, so row level security still applies.
+create or replace function search_clients(
+  p_query text default null,
+  p_after_created_at timestamptz default null,
+  p_after_id uuid default null,
+  p_limit integer default 50
+)
+returns table (
+  id uuid,
+  first_name text,
+  last_name text,
+  email text,
+  net_worth numeric,
+  risk_tolerance text,
+  created_at timestamptz
+)
+language plpgsql
+stable
+as $$
+declare
+  v_query tsquery := clients_search_query(p_query);
+  v_limit integer := least(greatest(coalesce(p_limit, 50), 1), 200);
+begin
+  if v_query is null and p_after_created_at is null then
+    return query
+      select c.id, c.first_name::text, c.last_name::text, c.email::text, c.net_worth::numeric, c.risk_tolerance::text, c.created_at::timestamptz
+      from clients c
+      order by c.created_at desc, c.id desc
+      limit v_limit;
+  elsif v_query is null then
+    return query
+      select c.id, c.first_name::text, c.last_name::text, c.email::text, c.net_worth::numeric, c.risk_tolerance::text, c.created_at::timestamptz
+      from clients c
+      where (c.created_at, c.id) < (p_after_created_at, p_after_id)
+      order by c.created_at desc, c.id desc
+      limit v_limit;
+  elsif p_after_created_at is null then
+    return query
+      select c.id, c.first_name::text, c.last_name::text, c.email::text, c.net_worth::numeric, c.risk_tolerance::text, c.created_at::timestamptz
+      from clients c
+      where c.search_tsv @@ v_query
+      order by c.created_at desc, c.id desc
+      limit v_limit;
+  else
+    return query
+      select c.id, c.first_name::text, c.last_name::text, c.email::text, c.net_worth::numeric, c.risk_tolerance::text, c.created_at::timestamptz
+      from clients c
+      where c.search_tsv @@ v_query
+        and (c.created_at, c.id) < (p_after_created_at, p_after_id)
+      order by c.created_at desc, c.id desc
+      limit v_limit;
+  end if;
+end;
+$$;
+
+grant execute on function clients_search_query(text) to authenticated;
+grant execute on function search_clients(text, timestamptz, uuid, integer) to authenticated;
@@ -0,0 +1,42 @@
+-- ============================================================================
+-- Migration: Render fingerprints for stored form PDFs
+-- ============================================================================
+-- Purpose:
+--   A generated PDF depends on three inputs: the template, the mapping
+--   rules (kyc_field_mappings.json + kyc_field_index.json + kycFiller.js) and
+--   the form data. form_renders keeps one row per forms row with a hash of
+--   each input as of the PDF currently in storage, so after a template or
+--   mapping change scripts/rerender_forms.py re-renders only the forms whose
+--   fingerprint no longer matches, instead of every stored PDF.
+--
+--   mapping_hash is the hash of the PDF field values the rules produce for
+--   that form's data, so a one-field mapping fix only changes it for forms
+--   that actually fill that field. template_hash likewise covers only the
+--   template fields the form fills (type, page and position of each widget),
+--   so static text or artwork changes need rerender_forms.py run --force.
+--
+-- Rows are written by scripts/rerender_forms.py (after an upload, or with
+-- the baseline subcommand to adopt the PDFs already in storage). Forms without a row are
+-- treated as never fingerprinted.
+--
+-- Run this after create_forms_tables.sql in your Supabase SQL editor
+-- ============================================================================
+
+create table if not exists form_renders (
+  form_id uuid not null references forms(id) on delete cascade,
+  template_hash text not null,
+  mapping_hash text not null,
+  data_hash text not null,
+  storage_path text null,                 -- generated-pdfs object the fingerprint describes
+  rendered_at timestamptz not null default now(),
+  constraint form_renders_pkey primary key (form_id)
+) TABLESPACE pg_default;
+
+comment on table form_renders is 'Input fingerprint (template, mapping, data hashes) of the stored PDF for each form; see scripts/rerender_forms.py.';
+comment on column form_renders.template_hash is 'sha256 of the template fields this form fills (type, page, position), not of the whole file.';
+comment on column form_renders.mapping_hash is 'sha256 of the PDF field values the mapping rules produce for this form''s data.';
+
+alter table form_renders enable row level security;
+drop policy if exists form_renders_read on form_renders;
+create policy form_renders_read on form_renders for select to authenticated using (true);
+grant select on form_renders to authenticated;
@@ -0,0 +1,111 @@
+-- ============================================================================
+-- Migration: Latest-form-per-client pointer
+-- ============================================================================
+-- Purpose:
+--   KYCForm.jsx prefills from the newest forms row for (client_id, form_type).
+--   Every edit inserts a new row, so "ORDER BY created_at DESC LIMIT 1" gets
+--   slower as history grows and depends on idx_forms_client_type_created
+--   existing. forms_latest keeps one pointer row per (client_id, form_type),
+--   maintained by triggers, so the prefill is a primary-key lookup.
+--
+-- Read path:
+--   select data from latest_forms where client_id = ? and form_type = 'kyc'
+--   (latest_forms joins the pointer to forms by primary key)
+--
+-- Run this after create_forms_tables.sql in your Supabase SQL editor
+-- ============================================================================
+
+create table if not exists forms_latest (
+  client_id uuid not null,
+  form_type text not null,
+  form_id uuid not null,
+  created_at timestamptz not null,
+  constraint forms_latest_pkey primary key (client_id, form_type)
+) TABLESPACE pg_default;
+
+create index if not exists idx_forms_latest_form on forms_latest (form_id);
+
+comment on table forms_latest is 'Pointer to the newest forms row per (client_id, form_type); maintained by triggers on forms.';
+
+-- The recompute path below needs this index; create it here in case it is missing
+create index if not exists idx_forms_client_type_created on forms (client_id, form_type, created_at desc);
+
+-- Point (client_id, form_type) at its newest remaining form, or drop the pointer
+create or replace function forms_latest_recompute(p_client_id uuid, p_form_type text)
+returns void
+language plpgsql
+security definer
+set search_path from current
+as $$
+begin
+  delete from forms_latest where client_id = p_client_id and form_type = p_form_type;
+  insert into forms_latest (client_id, form_type, form_id, created_at)
+  select f.client_id, f.form_type, f.id, f.created_at
+  from forms f
+  where f.client_id = p_client_id and f.form_type = p_form_type
+  order by f.created_at desc, f.id desc
+  limit 1;
+end;
+$$;
+
+create or replace function forms_latest_maintain()
+returns trigger
+language plpgsql
+security definer
+set search_path from current
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    if tg_op = 'DELETE'
+       or old.client_id is distinct from new.client_id
+       or old.form_type is distinct from new.form_type
+       or old.created_at is distinct from new.created_at then
+      if exists (select 1 from forms_latest where form_id = old.id) then
+        perform forms_latest_recompute(old.client_id, old.form_type);
+      end if;
+    end if;
+  end if;
+
+  if tg_op in ('INSERT', 'UPDATE') then
+    insert into forms_latest (client_id, form_type, form_id, created_at)
+    values (new.client_id, new.form_type, new.id, new.created_at)
+    on conflict (client_id, form_type) do update
+      set form_id = excluded.form_id,
+          created_at = excluded.created_at
+      where (forms_latest.created_at, forms_latest.form_id) <= (excluded.created_at, excluded.form_id);
+    return new;
+  end if;
+  return old;
+end;
+$$;
+
+drop trigger if exists trg_forms_latest on forms;
+create trigger trg_forms_latest
+  after insert or delete or update of client_id, form_type, created_at on forms
+  for each row execute function forms_latest_maintain();
+
+-- Backfill pointers for existing rows
+insert into forms_latest (client_id, form_type, form_id, created_at)
+select distinct on (client_id, form_type) client_id, form_type, id, created_at
+from forms
+order by client_id, form_type, created_at desc, id desc
+on conflict (client_id, form_type) do update
+  set form_id = excluded.form_id,
+      created_at = excluded.created_at;
+
+-- Read side: the newest form per (client_id, form_type).
+-- security_invoker keeps the caller's row level security on forms in effect.
+-- client_id/form_type come from the pointer so filters on them hit its primary key.
+create or replace view latest_forms with (security_invoker = true) as
+select f.id, l.client_id, l.form_type, f.form_template_id, f.version, f.status, f.data, f.pdf_url,
+       f.created_by, f.submitted_by, f.submitted_at, f.created_at, f.updated_at
+from forms_latest l
+join forms f on f.id = l.form_id;
+
+comment on view latest_forms is 'Newest forms row per (client_id, form_type), via the forms_latest pointer.';
+
+alter table forms_latest enable row level security;
+drop policy if exists forms_latest_read on forms_latest;
+create policy forms_latest_read on forms_latest for select to authenticated using (true);
+grant select on forms_latest to authenticated;
+grant select on latest_forms to authenticated;
@@ -0,0 +1,115 @@
+-- ============================================================================
+-- Migration: Range-partition form_events by month
+-- ============================================================================
+-- Purpose:
+--   form_events is an append-only audit log written on every fill/upload
+--   (kycFiller.js) and is the fastest-growing table. Partitioning it by
+--   month of created_at keeps hot queries and vacuum on recent partitions
+--   and lets old months be archived and detached as a unit
+--   (scripts/form_events_partitions.py).
+--
+-- Layout:
+--   form_events            partitioned parent, primary key (id, created_at)
+--   form_events_YYYY_MM    one partition per month, [first day, next first day)
+--   form_events_default    catches rows outside every monthly partition;
+--                          it should stay empty (the tool reports it)
+--
+-- Existing rows are copied into monthly partitions and ids are preserved.
+-- Safe to re-run: the conversion is skipped once form_events is partitioned.
+--
+-- Run this after create_forms_tables.sql in your Supabase SQL editor
+-- ============================================================================
+
+-- Create the partition for the month containing p_month (no-op if it exists)
+create or replace function form_events_create_partition(p_month date)
+returns text
+language plpgsql
+set search_path from current
+as $$
+declare
+  v_start date := date_trunc('month', p_month)::date;
+  v_end date := (v_start + interval '1 month')::date;
+  v_name text := format('form_events_%s', to_char(v_start, 'YYYY_MM'));
+  v_moved bigint;
+begin
+  if to_regclass(v_name) is not null then
+    if not (select relispartition from pg_class where oid = to_regclass(v_name)) then
+      raise exception '% exists but is not attached to form_events (archived with --keep-detached?); attach or drop it first', v_name;
+    end if;
+    return v_name;
+  end if;
+
+  -- Rows that landed in the default partition for this month would block the
+  -- new partition; park them, create it, then route them back
+  select count(*) into v_moved from form_events_default where created_at >= v_start and created_at < v_end;
+  if v_moved > 0 then
+    drop table if exists pg_temp.form_events_moved;
+    create temp table form_events_moved as
+      with d as (delete from form_events_default where created_at >= v_start and created_at < v_end returning *)
+      select * from d;
+  end if;
+
+  execute format('create table %I partition of form_events for values from (%L) to (%L)', v_name, v_start, v_end);
+
+  if v_moved > 0 then
+    insert into form_events select * from pg_temp.form_events_moved;
+    drop table pg_temp.form_events_moved;
+  end if;
+  return v_name;
+end;
+$$;
+
+do $$
+declare
+  v_month date;
+  v_last date;
+begin
+  if exists (select 1 from pg_class where oid = to_regclass('form_events') and relkind = 'p') then
+    raise notice 'form_events is already partitioned';
+    return;
+  end if;
+
+  alter table form_events rename to form_events_unpartitioned;
+  alter table form_events_unpartitioned rename constraint form_events_pkey to form_events_unpartitioned_pkey;
+  alter index if exists idx_form_events_form rename to idx_form_events_form_unpartitioned;
+  alter index if exists idx_form_events_created rename to idx_form_events_created_unpartitioned;
+  alter index if exists idx_form_events_payload_gin rename to idx_form_events_payload_gin_unpartitioned;
+
+  create table form_events (
+    id bigint not null default nextval('form_events_id_seq'),
+    form_id uuid not null references forms(id) on delete cascade,
+    event_type text not null,          -- created/updated/submitted/approved/pdf_generated/etc.
+    actor_id uuid null,                -- who performed the action
+    payload jsonb null default '{}'::jsonb, -- optional context/diff
+    created_at timestamptz not null default now(),
+    constraint form_events_pkey primary key (id, created_at)
+  ) partition by range (created_at);
+
+  alter sequence form_events_id_seq owned by form_events.id;
+
+  create index idx_form_events_form on form_events (form_id);
+  create index idx_form_events_created on form_events (created_at desc);
+  create index idx_form_events_payload_gin on form_events using gin (payload);
+
+  create table form_events_default partition of form_events default;
+
+  -- Monthly partitions from the oldest existing event through three months ahead
+  select coalesce(date_trunc('month', min(created_at)), date_trunc('month', now()))::date
+    into v_month from form_events_unpartitioned;
+  v_last := (date_trunc('month', now()) + interval '3 months')::date;
+  while v_month <= v_last loop
+    perform form_events_create_partition(v_month);
+    v_month := (v_month + interval '1 month')::date;
+  end loop;
+
+  insert into form_events (id, form_id, event_type, actor_id, payload, created_at)
+  select id, form_id, event_type, actor_id, payload, created_at
+  from form_events_unpartitioned;
+
+  drop table form_events_unpartitioned;
+end;
+$$;
+
+comment on table form_events is 'Immutable audit log of actions/events related to a form record. Partitioned by month of created_at.';
+comment on column form_events.payload is 'Optional JSONB payload describing the event context or diff.';
+comment on function form_events_create_partition(date) is 'Create the monthly form_events partition containing the given date; used by scripts/form_events_partitions.py.';
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Aggregate src/utils/logger.js output into per-stage latency and failure counts.
+
+Reads log files in one streaming pass (plain, .gz, or '-' for stdin). Both
+logger formats are understood:
+  compact  one JSON object per line: {time, level, message, meta, session, seq}
+           (VITE_LOG_FORMAT=compact); the line may carry a collector prefix
+  pretty   "[info] <time> <message>" followed by the meta as indented JSON
+
+Start/end messages of each fill stage (STAGES) are paired per logger session,
+first-in first-out, and the durations go into log-bucketed histograms (about 1%
+relative error) so memory stays flat however large the input is. Errors and
+warnings are counted by message and error kind.
+
+Usage:
+  python scripts/aggregate_logs.py app.log [more.log.gz ...] [--json summary.json] [--timeout 600]
+  kubectl logs deploy/web | python scripts/aggregate_logs.py -
+"""
+
+import argparse
+import collections
+import datetime
+import gzip
+import json
+import math
+import re
+import sys
+
+# name -> start message, end messages, failure messages (a failure closes the open start).
+# Only the first end message counts as unmatched when nothing is open; the others
+# (e.g. FormGenerator's download after its fill) close the stage if it is still open.
+STAGES = {
+    'kyc_submit': ('KYC form submission started', ['KYC PDF generated successfully'],
+                   ['KYC form submission error']),
+    'save_submission': ('KYC form submission started', ['Form submission saved'],
+                        ['Failed to save form submission', 'KYC form submission error']),
+    'kyc_fill': ('Starting KYC PDF fill process', ['KYC PDF filled successfully'],
+                 ['KYC form submission error']),
+    'template_load': ('Starting KYC PDF fill process', ['PDF template loaded'],
+                      ['KYC form submission error']),
+    'pdf_fill': ('PDF template loaded', ['KYC PDF filled successfully', 'Initiating PDF download'],
+                 ['KYC form submission error', 'PDF generation error']),
+    'storage_upload': ('KYC PDF filled successfully', ['PDF uploaded to storage'],
+                       ['Failed to upload PDF to storage', 'Storage upload failed, continuing with download-only']),
+    'event_log': ('PDF uploaded to storage', ['PDF generation event logged'],
+                  ['Failed to log PDF generation event']),
+    'template_generate': ('PDF generation requested', ['Download triggered'],
+                          ['PDF generation error', 'Download failed to trigger']),
+}
+
+PRETTY_RE = re.compile(r'^\[(debug|info|warn|error)\] (\d{4}-\d\d-\d\dT[\d:.]+Z) (.*?) ?$')
+ID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|\d+', re.I)
+GROWTH = 1.02
+LOG_GROWTH = math.log(GROWTH)
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of millisecond durations"""
+
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = collections.Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.buckets[math.floor(math.log(max(ms, 0.01)) / LOG_GROWTH)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(GROWTH ** (index + 1), self.max)
+        return self.max
+
+    def summary(self):
+        return {'count': self.count, 'mean_ms': self.total / self.count if self.count else None,
+                'p50_ms': self.percentile(50), 'p95_ms': self.percentile(95),
+                'p99_ms': self.percentile(99), 'max_ms': self.max if self.count else None}
+
+
+class Aggregator:
+    def __init__(self, timeout=600):
+        self.timeout = timeout
+        self.latency = {name: LatencyHistogram() for name in STAGES}
+        self.stage_counts = {name: collections.Counter() for name in STAGES}
+        self.failures = collections.Counter()
+        self.levels = collections.Counter()
+        self.records = 0
+        self.skipped = 0
+        self.pending = collections.defaultdict(collections.deque)
+        self.starts = collections.defaultdict(list)
+        self.ends = collections.defaultdict(list)
+        self.fails = collections.defaultdict(list)
+        for name, (start, ends, fails) in STAGES.items():
+            self.starts[start].append(name)
+            for message in ends:
+                self.ends[message].append(name)
+            for message in fails:
+                self.fails[message].append(name)
+        self.last_time = None
+
+    def add(self, record):
+        self.records += 1
+        level = record.get('level')
+        message = record.get('message')
+        self.levels[level] += 1
+        if level in ('error', 'warn'):
+            self.failures[(level, message, failure_kind(record.get('meta')))] += 1
+        if message not in self.starts and message not in self.ends and message not in self.fails:
+            return
+        try:
+            when = parse_time(record['time'])
+        except (KeyError, TypeError, ValueError):
+            self.skipped += 1
+            return
+        session = record.get('session', '-')
+
+        for name in self.ends.get(message, ()):
+            queue = self.pending.get((session, name))
+            if queue:
+                self.latency[name].add((when - queue.popleft()).total_seconds() * 1000)
+                self.stage_counts[name]['completed'] += 1
+            elif STAGES[name][1][0] == message:
+                self.stage_counts[name]['unmatched_end'] += 1
+        for name in self.fails.get(message, ()):
+            queue = self.pending.get((session, name))
+            if queue:
+                queue.popleft()
+                self.stage_counts[name]['failed'] += 1
+        for name in self.starts.get(message, ()):
+            self.pending[(session, name)].append(when)
+            self.stage_counts[name]['started'] += 1
+
+        if self.last_time is None or when - self.last_time > datetime.timedelta(seconds=self.timeout):
+            self.expire(when)
+            self.last_time = when
+
+    def expire(self, now=None):
+        """Drop starts older than the timeout (or all of them at end of input)"""
+        cutoff = now - datetime.timedelta(seconds=self.timeout) if now else None
+        for (session, name), queue in list(self.pending.items()):
+            while queue and (cutoff is None or queue[0] < cutoff):
+                queue.popleft()
+                self.stage_counts[name]['abandoned'] += 1
+            if not queue:
+                del self.pending[(session, name)]
+
+    def summary(self):
+        return {
+            'records': self.records,
+            'skipped': self.skipped,
+            'levels': dict(self.levels),
+            'stages': {name: {**self.latency[name].summary(), **self.stage_counts[name]} for name in STAGES},
+            'failures': [{'level': level, 'message': message, 'kind': kind, 'count': count}
+                         for (level, message, kind), count in self.failures.most_common()],
+        }
+
+
+def parse_time(text):
+    return datetime.datetime.fromisoformat(text.replace('Z', '+00:00'))
+
+
+def failure_kind(meta):
+    """Short, id-free label for what went wrong, taken from the logged meta"""
+    if not isinstance(meta, dict):
+        return ''
+    error = meta.get('error')
+    if isinstance(error, dict) and (error.get('code') or error.get('name')):
+        # codes (23505, 42501, PGRST116) and error names identify the failure as they are
+        return str(error.get('code') or error.get('name'))[:80]
+    if isinstance(error, dict):
+        text = error.get('message') or ''
+    elif error:
+        text = str(error)
+    else:
+        text = meta.get('message') or ''
+    # free text carries ids and counts; scrub them so messages group
+    return ID_RE.sub('N', str(text).splitlines()[0] if text else '')[:80]
+
+
+def open_log(path):
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def iter_records(lines):
+    """Yield logger records from compact and/or pretty output"""
+    pretty = None
+    meta_lines = []
+
+    def finish():
+        if meta_lines:
+            try:
+                pretty['meta'] = json.loads(''.join(meta_lines))
+            except ValueError:
+                pass
+        return pretty
+
+    for line in lines:
+        start = line.find('{"time"')
+        if start != -1:
+            if pretty:
+                yield finish()
+                pretty, meta_lines = None, []
+            try:
+                yield json.loads(line[start:])
+            except ValueError:
+                pass
+            continue
+        match = PRETTY_RE.match(line.rstrip('\n'))
+        if match:
+            if pretty:
+                yield finish()
+            pretty = {'level': match.group(1), 'time': match.group(2), 'message': match.group(3)}
+            meta_lines = []
+        elif pretty is not None:
+            meta_lines.append(line)
+    if pretty:
+        yield finish()
+
+
+def fmt_ms(value):
+    return f"{value:10.1f}" if value is not None else f"{'-':>10}"
+
+
+def print_summary(summary):
+    print(f"=== LOG SUMMARY ({summary['records']} records) ===")
+    for level in ('debug', 'info', 'warn', 'error'):
+        print(f"  {level:<6} {summary['levels'].get(level, 0)}")
+    print()
+    print("=== STAGE LATENCY (ms) ===")
+    print(f"  {'stage':<18} {'done':>7} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10} "
+          f"{'failed':>7} {'abandon':>7} {'no-start':>8}")
+    for name, stage in summary['stages'].items():
+        print(f"  {name:<18} {stage['count']:>7} {fmt_ms(stage['p50_ms'])} {fmt_ms(stage['p95_ms'])} "
+              f"{fmt_ms(stage['p99_ms'])} {fmt_ms(stage['max_ms'])} {stage.get('failed', 0):>7} "
+              f"{stage.get('abandoned', 0):>7} {stage.get('unmatched_end', 0):>8}")
+    print()
+    print("=== FAILURES ===")
+    if not summary['failures']:
+        print("  none")
+    for failure in summary['failures'][:30]:
+        kind = f" [{failure['kind']}]" if failure['kind'] else ''
+        print(f"  {failure['count']:>7}  {failure['level']:<5} {failure['message']}{kind}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate logger.js output into latency/failure stats')
+    parser.add_argument('logs', nargs='+', help="Log files (.gz ok) or '-' for stdin")
+    parser.add_argument('--json', help='Also write the summary here as JSON')
+    parser.add_argument('--timeout', type=int, default=600,
+                        help='Seconds after which an unmatched start is counted as abandoned')
+    args = parser.parse_args()
+
+    aggregator = Aggregator(timeout=args.timeout)
+    for path in args.logs:
+        with open_log(path) as f:
+            for record in iter_records(f):
+                if isinstance(record, dict):
+                    aggregator.add(record)
+    aggregator.expire()
+
+    summary = aggregator.summary()
+    print_summary(summary)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
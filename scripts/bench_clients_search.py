@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark the clients listing: old select('*') + browser-side filter vs the
+indexed search_clients() page (migrations/add_clients_search.sql).
+
+Seeds a throwaway schema (bench_clients) in a local Postgres with synthetic
+clients, applies the migration there and times both paths.
+
+Usage:
+  python scripts/bench_clients_search.py [dsn] [--clients 5000] [--query "singh"]
+"""
+
+import argparse
+
+from pg_common import connect, create_bench_schema, get_dsn, read_migration, seed_clients, timed
+
+SCHEMA = 'bench_clients'
+PAGE = 50
+
+
+def old_listing(cur, query):
+    """What ClientsTable.jsx did: every column of every client, filtered client-side"""
+    cur.execute('select * from clients order by created_at desc')
+    columns = [d.name for d in cur.description]
+    rows = [dict(zip(columns, r)) for r in cur.fetchall()]
+    q = query.lower()
+    matches = [r for r in rows if any(q in (r.get(k) or '').lower() for k in ('email', 'first_name', 'last_name'))]
+    return rows, matches
+
+
+def new_listing(cur, query, cursor=None):
+    cur.execute('select * from search_clients(%s, %s, %s, %s)',
+                (query, cursor[0] if cursor else None, cursor[1] if cursor else None, PAGE))
+    return cur.fetchall()
+
+
+def payload_size(rows):
+    return sum(len(repr(r)) for r in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark clients search / keyset pagination')
+    parser.add_argument('dsn', nargs='?')
+    parser.add_argument('--clients', type=int, default=5000)
+    parser.add_argument('--query', default='singh')
+    parser.add_argument('--keep', action='store_true', help=f'Keep the {SCHEMA} schema afterwards')
+    args = parser.parse_args()
+
+    results = {}
+    with connect(get_dsn(args.dsn), autocommit=True) as conn, conn.cursor() as cur:
+        create_bench_schema(cur, SCHEMA)
+        with timed(results, 'seed'):
+            seed_clients(cur, args.clients)
+        with timed(results, 'migration'):
+            cur.execute(read_migration('add_clients_search.sql'))
+            cur.execute('analyze clients')
+
+        with timed(results, 'old: select * + filter'):
+            all_rows, matches = old_listing(cur, args.query)
+        with timed(results, 'new: first page'):
+            page = new_listing(cur, args.query)
+        with timed(results, 'new: second page'):
+            page2 = new_listing(cur, args.query, (page[-1][6], page[-1][0])) if len(page) == PAGE else []
+        with timed(results, 'new: unfiltered first page'):
+            new_listing(cur, None)
+
+        cur.execute(
+            'explain (analyze, buffers, costs off) select id from clients '
+            'where search_tsv @@ clients_search_query(%s) order by created_at desc, id desc limit %s',
+            (args.query, PAGE))
+        plan = '\n'.join(r[0] for r in cur.fetchall())
+
+        if not args.keep:
+            cur.execute(f'drop schema {SCHEMA} cascade')
+
+    print(f"=== CLIENTS LISTING BENCHMARK ({args.clients} clients, query={args.query!r}) ===")
+    for label, ms in results.items():
+        print(f"  {label:<28} {ms:9.1f} ms")
+    print()
+    print(f"Old path transferred {len(all_rows)} rows (~{payload_size(all_rows) / 1024:.0f} KiB) "
+          f"to show {len(matches)} matches")
+    print(f"New path transferred {len(page)} rows (~{payload_size(page) / 1024:.0f} KiB); "
+          f"next page {len(page2)} rows")
+    print()
+    print("=== SEARCH PLAN ===")
+    print(plan)
+
+
+if __name__ == "__main__":
+    main()
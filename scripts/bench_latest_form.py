@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark the KYC prefill lookup: newest forms row for (client_id, form_type).
+
+Seeds a throwaway schema (bench_forms) with synthetic clients and a large
+forms history, then times random prefill lookups three ways:
+  - old query (ORDER BY created_at DESC LIMIT 1) with only idx_forms_client
+  - old query with idx_forms_client_type_created
+  - latest_forms view over the forms_latest pointer (migrations/create_forms_latest.sql)
+and the extra cost the pointer trigger adds to inserts.
+
+Usage:
+  python scripts/bench_latest_form.py [dsn] [--forms 2000000] [--clients 50000] [--lookups 2000]
+"""
+
+import argparse
+import random
+
+from pg_common import connect, create_bench_schema, get_dsn, read_migration, seed_clients, timed
+
+SCHEMA = 'bench_forms'
+
+OLD_QUERY = ("select data from forms where client_id = %s and form_type = 'kyc' "
+             "order by created_at desc limit 1")
+NEW_QUERY = "select data from latest_forms where client_id = %s and form_type = 'kyc'"
+
+
+def create_forms_table(cur):
+    """forms shaped like create_forms_tables.sql (no FKs to keep seeding fast)"""
+    cur.execute('''
+        create table forms (
+          id uuid primary key default gen_random_uuid(),
+          client_id uuid not null,
+          form_type text not null,
+          form_template_id uuid,
+          version integer not null default 1,
+          status text not null default 'draft',
+          data jsonb not null default '{}'::jsonb,
+          pdf_url text,
+          created_by uuid,
+          submitted_by uuid,
+          submitted_at timestamptz,
+          created_at timestamptz not null default now(),
+          updated_at timestamptz not null default now()
+        )''')
+    cur.execute('create index idx_forms_client on forms (client_id)')
+
+
+def seed_forms(cur, count):
+    """`count` forms spread over the clients, mostly kyc, each with a KYC-sized payload"""
+    cur.execute('''
+        with c as (
+          select row_number() over () as n, id, first_name, last_name, email, risk_tolerance,
+                 net_worth, tax_residency, investments, created_at
+          from clients
+        ), total as (select count(*) as n from clients)
+        insert into forms (client_id, form_type, status, data, created_at)
+        select c.id,
+               (array['kyc','kyc','kyc','trade_ticket','investor_profile'])[1 + (g %% 5)],
+               (array['draft','submitted'])[1 + (g %% 2)],
+               jsonb_build_object(
+                 'first_name', c.first_name, 'last_name', c.last_name, 'email', c.email,
+                 'risk_tolerance', c.risk_tolerance, 'net_worth', c.net_worth,
+                 'tax_residency', to_jsonb(c.tax_residency), 'investments', to_jsonb(c.investments),
+                 'notes', repeat('x', 200 + (g %% 400))),
+               c.created_at + (random() * interval '2 years')
+        from generate_series(1, %s) g
+        cross join total
+        join c on c.n = 1 + (hashint4(g) & 2147483647) %% total.n''', (count,))
+    cur.execute('analyze forms')
+
+
+def time_lookups(cur, query, client_ids):
+    found = 0
+    for client_id in client_ids:
+        cur.execute(query, (client_id,))
+        found += cur.fetchone() is not None
+    return found
+
+
+def time_inserts(cur, client_ids):
+    for client_id in client_ids:
+        cur.execute("insert into forms (client_id, form_type, data) values (%s, 'kyc', '{}')", (client_id,))
+
+
+def explain(cur, query, client_id):
+    cur.execute('explain (analyze, buffers, costs off) ' + query, (client_id,))
+    return '\n'.join(r[0] for r in cur.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark latest-form-per-client lookup')
+    parser.add_argument('dsn', nargs='?')
+    parser.add_argument('--forms', type=int, default=2000000)
+    parser.add_argument('--clients', type=int, default=50000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--inserts', type=int, default=2000)
+    parser.add_argument('--keep', action='store_true', help=f'Keep the {SCHEMA} schema afterwards')
+    args = parser.parse_args()
+
+    results = {}
+    with connect(get_dsn(args.dsn), autocommit=True) as conn, conn.cursor() as cur:
+        create_bench_schema(cur, SCHEMA)
+        with timed(results, 'seed clients'):
+            seed_clients(cur, args.clients)
+        create_forms_table(cur)
+        with timed(results, 'seed forms'):
+            seed_forms(cur, args.forms)
+
+        cur.execute('select id from clients')
+        ids = [r[0] for r in cur.fetchall()]
+        rng = random.Random(42)
+        sample = [rng.choice(ids) for _ in range(args.lookups)]
+        insert_sample = [rng.choice(ids) for _ in range(args.inserts)]
+
+        with timed(results, 'old query, idx_forms_client only'):
+            found_old = time_lookups(cur, OLD_QUERY, sample)
+        plan_old = explain(cur, OLD_QUERY, sample[0])
+
+        with timed(results, 'insert without pointer'):
+            time_inserts(cur, insert_sample)
+
+        with timed(results, 'composite index build'):
+            cur.execute('create index idx_forms_client_type_created on forms (client_id, form_type, created_at desc)')
+            cur.execute('analyze forms')
+        with timed(results, 'old query, composite index'):
+            time_lookups(cur, OLD_QUERY, sample)
+        plan_composite = explain(cur, OLD_QUERY, sample[0])
+
+        with timed(results, 'migration + backfill'):
+            cur.execute(read_migration('create_forms_latest.sql'))
+            cur.execute('analyze forms_latest')
+        with timed(results, 'latest_forms view'):
+            found_new = time_lookups(cur, NEW_QUERY, sample)
+        plan_new = explain(cur, NEW_QUERY, sample[0])
+
+        with timed(results, 'insert with pointer trigger'):
+            time_inserts(cur, insert_sample)
+
+        cur.execute('''
+            select count(*) from (
+              select distinct on (client_id, form_type) client_id, form_type, id
+              from forms order by client_id, form_type, created_at desc, id desc
+            ) d
+            left join forms_latest l using (client_id, form_type)
+            where l.form_id is distinct from d.id''')
+        stale = cur.fetchone()[0]
+        cur.execute('select count(*) from forms_latest')
+        pointers = cur.fetchone()[0]
+
+        if not args.keep:
+            cur.execute(f'drop schema {SCHEMA} cascade')
+
+    print(f"=== LATEST FORM BENCHMARK ({args.forms} forms, {args.clients} clients) ===")
+    for label, ms in results.items():
+        if label.startswith('old query') or label == 'latest_forms view':
+            print(f"  {label:<36} {ms:9.1f} ms  ({ms * 1000 / args.lookups:7.1f} us/lookup)")
+        elif label.startswith('insert'):
+            print(f"  {label:<36} {ms:9.1f} ms  ({ms * 1000 / args.inserts:7.1f} us/insert)")
+        else:
+            print(f"  {label:<36} {ms:9.1f} ms")
+    print()
+    print(f"Lookups with a kyc form: old {found_old}, new {found_new} of {args.lookups}")
+    print(f"Pointer rows: {pointers}; mismatches against DISTINCT ON recompute: {stale}")
+    print()
+    print("=== OLD PLAN (idx_forms_client only) ===")
+    print(plan_old)
+    print()
+    print("=== OLD PLAN (composite index) ===")
+    print(plan_composite)
+    print()
+    print("=== NEW PLAN ===")
+    print(plan_new)
+
+
+if __name__ == "__main__":
+    main()
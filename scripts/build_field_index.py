@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Build the compiled KYC field index (src/data/kyc_field_index.json).
+
+Joins, in one pass, the three layers that describe the same fields:
+  client_form_field_mapping.json  UI field -> supabase_column
+  kyc_field_mappings.json         logical KYC field -> PDF field(s)
+  kyc_pdf_fields.json             PDF field name -> type
+
+The output holds a flat column -> PDF field table, the per-field fill plan
+used by kycFiller.js (Btn lookups already resolved), and the broken links
+between layers.
+
+Usage:
+  python scripts/build_field_index.py            # write index + print report
+  python scripts/build_field_index.py --check    # exit 1 if the index is stale or links are broken
+"""
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA_DIR = os.path.join(ROOT, 'src', 'data')
+CLIENT_MAPPING = os.path.join(DATA_DIR, 'client_form_field_mapping.json')
+KYC_MAPPINGS = os.path.join(DATA_DIR, 'kyc_field_mappings.json')
+PDF_FIELDS = os.path.join(DATA_DIR, 'kyc_pdf_fields.json')
+INDEX_FILE = os.path.join(DATA_DIR, 'kyc_field_index.json')
+
+# Array columns that kycFiller.js expands into individual checkboxes
+# (kept in step with the tax residency / approval documents blocks there)
+ARRAY_VALUE_FIELDS = {
+    'tax_residency': {'Canada': 'Tax Resident Canada', 'US': 'Tax Resident US', 'Other': 'Other_3'},
+    'approval_documents': {
+        "Driver's License": 'Drivers License',
+        'Birth Certificate': 'Birth Certificate',
+        'Passport': 'Passport',
+        'Other': 'Other_2',
+    },
+}
+
+
+def load_json_file(filepath):
+    """Load JSON file"""
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+
+def _first_pdf_field(pdf_fields, *needles, field_type=None):
+    """Same search kycFiller.js used to run per fill: first name containing all needles"""
+    for field in pdf_fields:
+        name = field['name'].lower()
+        if all(n in name for n in needles) and (field_type is None or field['type'] == field_type):
+            return field['name']
+    return None
+
+
+def build_index(client_mapping, field_mappings, pdf_fields):
+    """Join the three layers and return (index, report)"""
+    pdf_types = {f['name']: f['type'] for f in pdf_fields}
+
+    # Logical field -> fill plan, with every value_map target resolved against the PDF
+    fill_plan = {}
+    targets = {}  # PDF field -> logical fields writing to it
+    missing_pdf = {}
+    for logical, mapping in field_mappings.items():
+        if not isinstance(mapping, dict) or not mapping.get('pdf_field'):
+            continue
+        entry = {'type': mapping.get('type', 'text'), 'pdf_field': mapping['pdf_field']}
+        names = [mapping['pdf_field']]
+        for key in ('checked_value', 'unchecked_value'):
+            if key in mapping:
+                entry[key] = mapping[key]
+        if mapping.get('value_map'):
+            entry['value_map'] = {
+                value: {'pdf_field': target, 'is_btn': pdf_types.get(target) == 'Btn'}
+                for value, target in mapping['value_map'].items()
+            }
+            names.extend(mapping['value_map'].values())
+        fill_plan[logical] = entry
+        for name in dict.fromkeys(names):
+            targets.setdefault(name, []).append(logical)
+            if name not in pdf_types:
+                missing_pdf.setdefault(logical, []).append(name)
+
+    for column, value_map in ARRAY_VALUE_FIELDS.items():
+        for target in value_map.values():
+            targets.setdefault(target, []).append(column)
+            if target not in pdf_types:
+                missing_pdf.setdefault(column, []).append(target)
+
+    # Supabase column -> UI field -> PDF fields
+    columns = {}
+    column_without_mapping = []
+    column_without_pdf = []
+    for section, fields in client_mapping.get('client_form_fields', {}).items():
+        for ui_field, spec in fields.items():
+            column = spec.get('supabase_column') or ui_field
+            if column in fill_plan:
+                plan = fill_plan[column]
+                pdf = [plan['pdf_field']] + [v['pdf_field'] for v in plan.get('value_map', {}).values()]
+            elif column in ARRAY_VALUE_FIELDS:
+                pdf = list(ARRAY_VALUE_FIELDS[column].values())
+            else:
+                pdf = []
+                column_without_mapping.append(column)
+            pdf = [name for name in dict.fromkeys(pdf) if name in pdf_types]
+            if not pdf and column not in column_without_mapping:
+                column_without_pdf.append(column)
+            columns[column] = {
+                'ui_field': spec.get('field_name', ui_field),
+                'section': section,
+                'ui_type': spec.get('type'),
+                'required': bool(spec.get('required')),
+                'logical_field': column if column in fill_plan or column in ARRAY_VALUE_FIELDS else None,
+                'pdf_fields': pdf,
+            }
+
+    column_names = set(columns)
+    index = {
+        'columns': columns,
+        'fill_plan': fill_plan,
+        'array_fields': ARRAY_VALUE_FIELDS,
+        'pdf_field_types': pdf_types,
+        'fallback_fields': {
+            'other_countries': _first_pdf_field(pdf_fields, 'country', 'other'),
+            'other_investments': _first_pdf_field(pdf_fields, 'investment', 'other'),
+            'other_text': _first_pdf_field(pdf_fields, 'other', field_type='Tx'),
+        },
+    }
+    report = {
+        'column_without_mapping': sorted(column_without_mapping),
+        'column_without_pdf': sorted(column_without_pdf),
+        'mapping_pdf_missing': {k: sorted(v) for k, v in sorted(missing_pdf.items())},
+        'pdf_without_source': sorted(name for name in pdf_types if name not in targets),
+        'pdf_multiple_sources': {k: v for k, v in sorted(targets.items()) if len(set(v)) > 1 and k in pdf_types},
+        'logical_without_column': sorted(k for k in fill_plan if k not in column_names),
+    }
+    return index, report
+
+
+def render(index):
+    return json.dumps(index, indent=2, ensure_ascii=False) + '\n'
+
+
+def build_from_files():
+    return build_index(load_json_file(CLIENT_MAPPING), load_json_file(KYC_MAPPINGS), load_json_file(PDF_FIELDS))
+
+
+def print_report(report, index):
+    print("=== KYC FIELD INDEX ===")
+    print(f"Supabase columns: {len(index['columns'])}")
+    print(f"Logical fields: {len(index['fill_plan'])}")
+    print(f"PDF fields: {len(index['pdf_field_types'])}")
+    print()
+
+    sections = [
+        ('column_without_mapping', 'SUPABASE COLUMNS WITH NO KYC MAPPING'),
+        ('column_without_pdf', 'SUPABASE COLUMNS WITH NO PDF FIELD'),
+        ('mapping_pdf_missing', "MAPPINGS TO PDF FIELDS THAT DON'T EXIST"),
+        ('pdf_without_source', 'PDF FIELDS WITH NO SOURCE'),
+        ('pdf_multiple_sources', 'PDF FIELDS WRITTEN BY SEVERAL FIELDS'),
+        ('logical_without_column', 'KYC-ONLY FIELDS (no clients column)'),
+    ]
+    for key, title in sections:
+        items = report[key]
+        if not items:
+            continue
+        print(f"=== {title} ({len(items)}) ===")
+        if isinstance(items, dict):
+            for name, values in items.items():
+                print(f"  - {name}: {', '.join(values)}")
+        else:
+            for name in items[:50]:
+                print(f"  - {name}")
+            if len(items) > 50:
+                print(f"  ... and {len(items) - 50} more")
+        print()
+
+
+def is_broken(report):
+    return bool(report['column_without_pdf'] or report['mapping_pdf_missing'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the compiled KYC field index')
+    parser.add_argument('--check', action='store_true',
+                        help="Don't write; exit 1 if the index is out of date or has broken links")
+    parser.add_argument('--quiet', action='store_true', help='Only print problems')
+    args = parser.parse_args()
+
+    index, report = build_from_files()
+    text = render(index)
+
+    if args.check:
+        current = open(INDEX_FILE).read() if os.path.exists(INDEX_FILE) else None
+        if current != text:
+            print(f"{os.path.relpath(INDEX_FILE, ROOT)} is out of date; run scripts/build_field_index.py")
+            sys.exit(1)
+        if is_broken(report):
+            print_report(report, index)
+            sys.exit(1)
+        return
+
+    with open(INDEX_FILE, 'w') as f:
+        f.write(text)
+    if not args.quiet:
+        print_report(report, index)
+    print(f"Saved index to: {os.path.relpath(INDEX_FILE, ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Template Version Diff
+Compares the form fields of two KYC template revisions and works out which
+fields were renamed, so a new dealer template doesn't turn `City` -> `City_2`
+or the `Last NameBusiness Name` quirk into a delete plus an add.
+
+Each side is a template PDF (names, types and widget page/position) or a field
+list JSON (kyc_pdf_fields.json, or a .fields.json from fetch_templates.py;
+names and types only). A name present in both revisions is the same field
+(unchanged, moved or retyped) and is never renamed. Only names that disappeared
+are paired with names that appeared, greedily, by a score combining name
+similarity with widget page and distance. Distances are measured after undoing
+the shift most of a page's fields share, so content moved as a block (a field
+inserted above) does not look like a reshuffle.
+
+Outputs:
+  - renamed / removed / added / retyped / moved fields
+  - an RFC 6902 patch for src/data/kyc_field_mappings.json (--patch), or the
+    patched mappings themselves (--write-mappings; only the renamed values
+    change, so the file keeps its hand-formatted layout)
+  - names the patch cannot fix: buttons hardcoded in kycFiller.js, and fallback
+    fields in kyc_field_index.json (re-run build_field_index.py)
+  - affected logical fields, and the query selecting the latest KYC forms rows
+    whose data touches them, so only those PDFs are re-rendered
+  - the new kyc_pdf_fields.json (--write-fields, one field per line as committed);
+    run build_field_index.py after
+
+Usage:
+  python scripts/diff_templates.py old.pdf new.pdf [--patch patch.json] [--write-mappings]
+                                   [--write-fields] [--json report.json]
+  python scripts/diff_templates.py src/data/kyc_pdf_fields.json new.pdf
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import sys
+from difflib import SequenceMatcher
+
+try:
+    import PyPDF2
+except Exception:
+    print('PyPDF2 not installed. Please run: pip install PyPDF2')
+    sys.exit(1)
+
+from kyc_pdf_data import KYC_MAPPINGS, field_references, load_rules
+
+PDF_FIELDS = os.path.join(os.path.dirname(KYC_MAPPINGS), 'kyc_pdf_fields.json')
+SUFFIX_RE = re.compile(r'_\d+$')
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+WS_RE = re.compile(r'\s*')
+MOVE_TOLERANCE = 12.0       # points; a same-named field further than this is reported as moved
+DISTANCE_SCALE = 150.0      # points at which position similarity reaches 0
+RENAME_THRESHOLD = 0.6
+MANUAL_SOURCES = (
+    ('kycFiller.js', 'HARDCODED IN kycFiller.js (edit by hand)'),
+    ('kyc_field_index.json', 'FALLBACK FIELDS IN kyc_field_index.json '
+                             '(re-run build_field_index.py; adjust its name search if it no longer matches)'),
+)
+NAME_ONLY_THRESHOLD = 0.8
+
+
+class TemplateField:
+    __slots__ = ('name', 'type', 'page', 'rect')
+
+    def __init__(self, name, field_type, page=None, rect=None):
+        self.name = name
+        self.type = field_type
+        self.page = page
+        self.rect = rect
+
+    @property
+    def center(self):
+        x0, y0, x1, y1 = self.rect
+        return ((x0 + x1) / 2, (y0 + y1) / 2)
+
+    def to_dict(self):
+        return {'name': self.name, 'type': self.type, 'page': self.page, 'rect': self.rect}
+
+
+def widget_field_name(annot):
+    """Fully qualified field name of a widget annotation (parent /T chain)"""
+    parts = []
+    node = annot
+    while node is not None:
+        if '/T' in node:
+            parts.append(str(node['/T']))
+        node = node.get('/Parent')
+        node = node.get_object() if node is not None else None
+    return '.'.join(reversed(parts))
+
+
+def inherited_value(annot, key):
+    """`key` from the widget or the nearest ancestor field that sets it"""
+    node = annot
+    while node is not None:
+        if key in node:
+            return node[key]
+        node = node.get('/Parent')
+        node = node.get_object() if node is not None else None
+    return None
+
+
+def load_pdf_fields(path):
+    """{name: TemplateField} from the widget annotations; a field's first widget gives its position"""
+    reader = PyPDF2.PdfReader(path)
+    fields = {}
+    for page_no, page in enumerate(reader.pages, 1):
+        for annot in page.get('/Annots') or []:
+            annot = annot.get_object()
+            if annot.get('/Subtype') != '/Widget':
+                continue
+            name = widget_field_name(annot)
+            if not name or name in fields:
+                continue
+            field_type = str(inherited_value(annot, '/FT') or '')[1:] or None
+            rect = [round(float(v), 1) for v in annot.get('/Rect', [0, 0, 0, 0])]
+            fields[name] = TemplateField(name, field_type, page_no, rect)
+    return fields
+
+
+def load_json_fields(path):
+    """{name: TemplateField} from [{name, type}] or {name: {fieldType | type}}"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    items = data.values() if isinstance(data, dict) else data
+    fields = {}
+    for item in items:
+        field_type = item.get('fieldType') or item.get('type')
+        fields[item['name']] = TemplateField(item['name'], str(field_type).lstrip('/') if field_type else None)
+    return fields
+
+
+def load_fields(path):
+    return load_pdf_fields(path) if path.lower().endswith('.pdf') else load_json_fields(path)
+
+
+def normalize_name(name):
+    return NON_ALNUM_RE.sub('', name.lower())
+
+
+def name_similarity(a, b):
+    na, nb = normalize_name(a), normalize_name(b)
+    if na == nb:
+        return 1.0
+    base_a, base_b = normalize_name(SUFFIX_RE.sub('', a)), normalize_name(SUFFIX_RE.sub('', b))
+    if base_a == base_b:
+        return 0.9
+    return SequenceMatcher(None, na, nb).ratio()
+
+
+def page_offsets(old, new):
+    """{page: (dx, dy)} shift shared by most same-named fields on each page, so a page whose
+    content moved as a block (a field inserted above, a new header) is compared after undoing it.
+    Pages without such a majority get no offset."""
+    shifts = {}
+    for name, a in old.items():
+        b = new.get(name)
+        if b is None or a.rect is None or b.rect is None or a.page != b.page:
+            continue
+        (ax, ay), (bx, by) = a.center, b.center
+        shifts.setdefault(a.page, []).append((bx - ax, by - ay))
+    offsets = {}
+    for page, moves in shifts.items():
+        best = max(([m for m in moves if math.dist(m, shift) <= MOVE_TOLERANCE] for shift in moves), key=len)
+        if len(best) * 2 > len(moves):
+            offsets[page] = (statistics.median(dx for dx, _ in best), statistics.median(dy for _, dy in best))
+    return offsets
+
+
+def position_similarity(a, b, offsets=None):
+    """1.0 for the same spot on the same page (after the page offset), falling to 0 at DISTANCE_SCALE;
+    None without geometry"""
+    if a.rect is None or b.rect is None:
+        return None
+    if a.page != b.page:
+        return 0.0
+    dx, dy = (offsets or {}).get(a.page, (0.0, 0.0))
+    (ax, ay), center = a.center, b.center
+    return max(0.0, 1.0 - math.dist((ax + dx, ay + dy), center) / DISTANCE_SCALE)
+
+
+def rename_score(a, b, offsets=None):
+    names = name_similarity(a.name, b.name)
+    position = position_similarity(a, b, offsets)
+    if position is None:
+        return names, names, None
+    return 0.4 * names + 0.6 * position, names, position
+
+
+def diff_fields(old, new):
+    """Pair old and new fields; returns the diff as a dict of lists.
+
+    Names present in both versions are always the same field (unchanged, moved or
+    retyped); only names that disappeared are paired with names that appeared.
+    """
+    unchanged, moved, retyped = [], [], []
+    for name, field in old.items():
+        other = new.get(name)
+        if other is None:
+            continue
+        if field.type != other.type and field.type and other.type:
+            retyped.append({'name': name, 'old_type': field.type, 'new_type': other.type})
+        elif field.rect is not None and other.rect is not None and (
+                field.page != other.page or math.dist(field.center, other.center) > MOVE_TOLERANCE):
+            moved.append({'name': name, 'old': field.to_dict(), 'new': other.to_dict()})
+        else:
+            unchanged.append(name)
+
+    pool_old = [field for name, field in old.items() if name not in new]
+    pool_new = [field for name, field in new.items() if name not in old]
+    offsets = page_offsets(old, new)
+    candidates = []
+    for a in pool_old:
+        for b in pool_new:
+            if a.type and b.type and a.type != b.type:
+                continue
+            score, names, position = rename_score(a, b, offsets)
+            threshold = NAME_ONLY_THRESHOLD if position is None else RENAME_THRESHOLD
+            if score >= threshold and (names >= 0.3 or (position or 0) >= 0.9):
+                candidates.append((score, a.name, b.name, names, position))
+
+    renamed = []
+    used_old, used_new = set(), set()
+    for score, old_name, new_name, names, position in sorted(candidates, key=lambda c: (-c[0], c[1], c[2])):
+        if old_name in used_old or new_name in used_new:
+            continue
+        used_old.add(old_name)
+        used_new.add(new_name)
+        renamed.append({'old': old_name, 'new': new_name, 'score': round(score, 3),
+                        'name_similarity': round(names, 3),
+                        'position_similarity': None if position is None else round(position, 3)})
+
+    return {
+        'unchanged': sorted(unchanged),
+        'renamed': renamed,
+        'moved': moved,
+        'retyped': retyped,
+        'removed': sorted(f.name for f in pool_old if f.name not in used_old),
+        'added': sorted(f.name for f in pool_new if f.name not in used_new),
+    }
+
+
+def _pointer(*parts):
+    return ''.join('/' + str(p).replace('~', '~0').replace('/', '~1') for p in parts)
+
+
+def mapping_patch(mappings, renames):
+    """RFC 6902 operations replacing renamed PDF field names in kyc_field_mappings.json"""
+    ops = []
+    for logical, mapping in mappings.items():
+        if not isinstance(mapping, dict):
+            continue
+        if mapping.get('pdf_field') in renames:
+            ops.append({'op': 'replace', 'path': _pointer(logical, 'pdf_field'), 'value': renames[mapping['pdf_field']]})
+        for key, value in (mapping.get('value_map') or {}).items():
+            if value in renames:
+                ops.append({'op': 'replace', 'path': _pointer(logical, 'value_map', key), 'value': renames[value]})
+    return ops
+
+
+def _pointer_keys(path):
+    return [k.replace('~1', '/').replace('~0', '~') for k in path.split('/')[1:]]
+
+
+def apply_patch(mappings, ops):
+    patched = json.loads(json.dumps(mappings))
+    for op in ops:
+        keys = _pointer_keys(op['path'])
+        target = patched
+        for key in keys[:-1]:
+            target = target[key]
+        target[keys[-1]] = op['value']
+    return patched
+
+
+def value_span(text, keys):
+    """(start, end) of the value at object path `keys` in JSON text"""
+    decoder = json.JSONDecoder()
+    pos = WS_RE.match(text).end()
+    for key in keys:
+        if text[pos] != '{':
+            raise KeyError(key)
+        pos = WS_RE.match(text, pos + 1).end()
+        while True:
+            if text[pos] == '}':
+                raise KeyError(key)
+            name, pos = decoder.raw_decode(text, pos)
+            pos = WS_RE.match(text, WS_RE.match(text, pos).end() + 1).end()  # past ':'
+            if name == key:
+                break
+            pos = WS_RE.match(text, decoder.raw_decode(text, pos)[1]).end()
+            if text[pos] == ',':
+                pos = WS_RE.match(text, pos + 1).end()
+    return pos, decoder.raw_decode(text, pos)[1]
+
+
+def apply_patch_text(text, ops):
+    """apply_patch on the file text: each replaced value is swapped in place, so the
+    hand-formatted layout of kyc_field_mappings.json is kept"""
+    edits = sorted((value_span(text, _pointer_keys(op['path'])), op['value']) for op in ops)
+    patched = text
+    for (start, end), value in reversed(edits):
+        patched = patched[:start] + json.dumps(value, ensure_ascii=False) + patched[end:]
+    if json.loads(patched) != apply_patch(json.loads(text), ops):
+        raise ValueError('in-place patch does not match apply_patch')
+    return patched
+
+
+def render_field_list(fields):
+    """kyc_pdf_fields.json layout: one compact object per line"""
+    rows = [json.dumps({'name': f.name, 'type': f.type}, separators=(',', ':'), ensure_ascii=False)
+            for f in fields]
+    return '[\n' + ',\n'.join('  ' + row for row in rows) + '\n]\n'
+
+
+def affected_fields(diff, refs, fixed):
+    """Logical fields reading any changed PDF field, plus names the mapping patch cannot fix"""
+    changed = {r['old'] for r in diff['renamed']} | set(diff['removed'])
+    changed |= {r['name'] for r in diff['retyped']}
+    logical = set()
+    for name in changed:
+        logical |= refs.get(name, set())
+    renames = {r['old']: r['new'] for r in diff['renamed']}
+    manual = [{'pdf_field': name, 'logical': fixed[name][0], 'source': fixed[name][1], 'new': renames.get(name)}
+              for name in sorted(changed) if name in fixed]
+    unmapped = sorted(name for name in changed if name not in refs)
+    return sorted(logical), manual, unmapped
+
+
+def rerender_query(logical_fields):
+    """Latest KYC forms rows whose data has any affected key (uses idx_forms_data_gin via ?|)"""
+    if not logical_fields:
+        return None
+    keys = ', '.join("'" + name.replace("'", "''") + "'" for name in logical_fields)
+    return ("select id, client_id from latest_forms\n"
+            f"where form_type = 'kyc' and data ?| array[{keys}];")
+
+
+def print_report(diff, ops, affected, manual, unmapped, query):
+    print("=== TEMPLATE DIFF ===")
+    for key in ('unchanged', 'renamed', 'moved', 'retyped', 'removed', 'added'):
+        print(f"  {key:<10} {len(diff[key])}")
+    if diff['renamed']:
+        print("\n=== RENAMED ===")
+        for r in diff['renamed']:
+            position = '' if r['position_similarity'] is None else f", position {r['position_similarity']:.2f}"
+            print(f"  {r['old']!r} -> {r['new']!r}  (score {r['score']:.2f}: name {r['name_similarity']:.2f}{position})")
+    for key in ('removed', 'added'):
+        if diff[key]:
+            print(f"\n=== {key.upper()} ===")
+            for name in diff[key]:
+                print(f"  {name!r}")
+    if diff['retyped']:
+        print("\n=== TYPE CHANGED ===")
+        for r in diff['retyped']:
+            print(f"  {r['name']!r}: {r['old_type']} -> {r['new_type']}")
+    print(f"\n=== MAPPING PATCH ({len(ops)} operations) ===")
+    for op in ops:
+        print(f"  {op['op']} {op['path']} = {op['value']!r}")
+    for source, title in MANUAL_SOURCES:
+        entries = [m for m in manual if m['source'] == source]
+        if not entries:
+            continue
+        print(f"\n=== {title} ===")
+        for m in entries:
+            print(f"  {m['pdf_field']!r} ({m['logical']}) -> {m['new']!r}" if m['new'] else
+                  f"  {m['pdf_field']!r} ({m['logical']}) removed")
+    if unmapped:
+        print(f"\nChanged fields no mapping uses: {len(unmapped)}")
+    print(f"\n=== AFFECTED LOGICAL FIELDS ({len(affected)}) ===")
+    for name in affected:
+        print(f"  {name}")
+    if query:
+        print("\n=== FORMS TO RE-RENDER ===")
+        print(query)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff two KYC template versions with rename detection')
+    parser.add_argument('old', help='Old template PDF or field list JSON')
+    parser.add_argument('new', help='New template PDF or field list JSON')
+    parser.add_argument('--mappings', default=KYC_MAPPINGS)
+    parser.add_argument('--patch', help='Write the RFC 6902 mapping patch here')
+    parser.add_argument('--write-mappings', nargs='?', const=KYC_MAPPINGS,
+                        help='Write patched mappings (default: in place)')
+    parser.add_argument('--write-fields', nargs='?', const=PDF_FIELDS,
+                        help="Write the new template's field list (default: src/data/kyc_pdf_fields.json)")
+    parser.add_argument('--json', help='Write the full report here')
+    args = parser.parse_args()
+
+    old, new = load_fields(args.old), load_fields(args.new)
+    diff = diff_fields(old, new)
+    renames = {r['old']: r['new'] for r in diff['renamed']}
+
+    rules = load_rules(args.mappings)
+    mappings = rules[0]
+    ops = mapping_patch(mappings, renames)
+    refs, fixed = field_references(rules)
+    affected, manual, unmapped = affected_fields(diff, refs, fixed)
+    query = rerender_query(affected)
+
+    print_report(diff, ops, affected, manual, unmapped, query)
+
+    if args.patch:
+        with open(args.patch, 'w') as f:
+            json.dump(ops, f, indent=2)
+        print(f"\nPatch written to {args.patch}")
+    if args.write_mappings:
+        with open(args.mappings, 'r') as f:
+            text = f.read()
+        with open(args.write_mappings, 'w') as f:
+            f.write(apply_patch_text(text, ops))
+        print(f"Mappings written to {args.write_mappings}")
+    if args.write_fields:
+        with open(args.write_fields, 'w') as f:
+            f.write(render_field_list(new.values()))
+        print(f"Field list written to {args.write_fields} (run build_field_index.py next)")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'diff': diff, 'patch': ops, 'affected_logical_fields': affected,
+                       'manual_edits': manual, 'unmapped_changes': unmapped, 'rerender_query': query}, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
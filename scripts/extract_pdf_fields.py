@@ -10,52 +10,58 @@ import PyPDF2
 from io import BytesIO
 import json
 
-def extract_pdf_fields(pdf_url):
-    """Extract all form fields from a PDF URL"""
-    try:
-        # Download the PDF
-        print(f"Downloading PDF from: {pdf_url}")
-        response = requests.get(pdf_url)
-        response.raise_for_status()
-
-        # Create PDF reader
-        pdf_data = BytesIO(response.content)
-        pdf_reader = PyPDF2.PdfReader(pdf_data)
+def extract_fields_from_bytes(pdf_bytes, verbose=False):
+    """Extract all form fields from PDF bytes"""
+    pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_bytes))
 
+    if verbose:
         print(f"PDF loaded. Pages: {len(pdf_reader.pages)}")
 
-        # Check if PDF has form fields
-        if not pdf_reader.get_fields():
+    # Check if PDF has form fields
+    pdf_fields = pdf_reader.get_fields()
+    if not pdf_fields:
+        if verbose:
             print("No form fields found in PDF")
-            return {}
+        return {}
 
-        # Extract field information
-        fields = {}
-        pdf_fields = pdf_reader.get_fields()
+    # Extract field information
+    fields = {}
 
+    if verbose:
         print(f"Found {len(pdf_fields)} form fields:")
 
-        for field_name, field_obj in pdf_fields.items():
-            field_info = {
-                'name': field_name,
-                'type': str(type(field_obj).__name__),
-                'value': str(field_obj.value) if field_obj.value is not None else None,
-            }
+    for field_name, field_obj in pdf_fields.items():
+        field_info = {
+            'name': field_name,
+            'type': str(type(field_obj).__name__),
+            'value': str(field_obj.value) if field_obj.value is not None else None,
+        }
 
-            # Add additional properties based on field type
-            if hasattr(field_obj, 'fieldType'):
-                field_info['fieldType'] = field_obj.fieldType
+        # Add additional properties based on field type
+        if hasattr(field_obj, 'fieldType'):
+            field_info['fieldType'] = field_obj.fieldType
 
-            if hasattr(field_obj, 'options'):
-                field_info['options'] = field_obj.options
+        if hasattr(field_obj, 'options'):
+            field_info['options'] = field_obj.options
 
-            if hasattr(field_obj, 'checked'):
-                field_info['checked'] = field_obj.checked
+        if hasattr(field_obj, 'checked'):
+            field_info['checked'] = field_obj.checked
 
-            fields[field_name] = field_info
+        fields[field_name] = field_info
+        if verbose:
             print(f"  - {field_name}: {field_info.get('fieldType', 'Unknown')}")
 
-        return fields
+    return fields
+
+def extract_pdf_fields(pdf_url):
+    """Extract all form fields from a PDF URL"""
+    try:
+        # Download the PDF
+        print(f"Downloading PDF from: {pdf_url}")
+        response = requests.get(pdf_url, timeout=60)
+        response.raise_for_status()
+
+        return extract_fields_from_bytes(response.content, verbose=True)
 
     except Exception as e:
         print(f"Error extracting PDF fields: {e}")
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Template Fetcher
+Refreshes every PDF template (and its extracted field metadata) concurrently.
+
+- one pooled aiohttp session with bounded concurrency
+- per-request timeouts and retries with backoff
+- ETag / If-Modified-Since revalidation, so unchanged templates cost a 304
+- local on-disk store: <store>/<key>.pdf, <key>.meta.json, <key>.fields.json
+- field extraction (extract_pdf_fields.extract_fields_from_bytes) runs on a
+  process pool only for templates whose bytes changed
+
+Usage:
+  python scripts/fetch_templates.py <pdf_url> [<pdf_url> ...]
+  python scripts/fetch_templates.py --supabase     # every row in form_templates
+  python scripts/fetch_templates.py --self-check   # exercise the fetcher against a local server
+Options:
+  --store DIR          on-disk store (default: .template_cache)
+  --concurrency N      simultaneous downloads (default: 8)
+  --no-extract         only download / revalidate
+"""
+
+import argparse
+import asyncio
+import collections
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote, urlparse
+
+try:
+    import aiohttp
+    from aiohttp import web
+except Exception:
+    print('aiohttp not installed. Please run: pip install aiohttp')
+    sys.exit(1)
+
+DEFAULT_STORE = '.template_cache'
+DEFAULT_CONCURRENCY = 8
+TIMEOUT_SECONDS = 60
+RETRIES = 3
+BACKOFF_SECONDS = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TemplateStore:
+    """On-disk cache of template bytes plus their HTTP validators"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key_for(url):
+        """Stable, readable file key: <basename>-<short url hash>"""
+        name = os.path.splitext(unquote(os.path.basename(urlparse(url).path)))[0] or 'template'
+        safe = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+        return f"{safe}-{hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]}"
+
+    def path(self, key, suffix):
+        return os.path.join(self.root, key + suffix)
+
+    def read_json(self, key, suffix):
+        try:
+            with open(self.path(key, suffix), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_json(self, key, suffix, data):
+        self._atomic_write(self.path(key, suffix), json.dumps(data, indent=2).encode('utf-8'))
+
+    def read_pdf(self, key):
+        with open(self.path(key, '.pdf'), 'rb') as f:
+            return f.read()
+
+    def write_pdf(self, key, data):
+        self._atomic_write(self.path(key, '.pdf'), data)
+
+    @staticmethod
+    def _atomic_write(path, data):
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+async def _get(session, url, headers):
+    """GET with retries on transient failures. Returns (status, headers, body)"""
+    last_error = None
+    for attempt in range(RETRIES):
+        if attempt:
+            await asyncio.sleep(BACKOFF_SECONDS * (2 ** (attempt - 1)))
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status in RETRY_STATUSES:
+                    last_error = f"HTTP {response.status}"
+                    continue
+                if response.status == 304:
+                    return 304, response.headers, None
+                response.raise_for_status()
+                return response.status, response.headers, await response.read()
+        except aiohttp.ClientResponseError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            last_error = f"{type(e).__name__}: {e}"
+    raise RuntimeError(f"giving up after {RETRIES} attempts: {last_error}")
+
+
+async def fetch_one(session, store, url, semaphore):
+    """Download or revalidate one template. Returns a result dict"""
+    key = store.key_for(url)
+    meta = store.read_json(key, '.meta.json') or {}
+    have_pdf = os.path.exists(store.path(key, '.pdf'))
+
+    headers = {}
+    if have_pdf and meta.get('url') == url:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    started = time.monotonic()
+    result = {'url': url, 'key': key}
+    try:
+        async with semaphore:
+            status, response_headers, data = await _get(session, url, headers)
+    except Exception as e:
+        result.update(status='error', error=str(e), seconds=time.monotonic() - started)
+        return result
+
+    if status == 304:
+        result.update(status='not_modified', sha256=meta.get('sha256'), seconds=time.monotonic() - started)
+        return result
+
+    digest = hashlib.sha256(data).hexdigest()
+    changed = not have_pdf or digest != meta.get('sha256')
+    if changed:
+        store.write_pdf(key, data)
+    store.write_json(key, '.meta.json', {
+        'url': url,
+        'etag': response_headers.get('ETag'),
+        'last_modified': response_headers.get('Last-Modified'),
+        'sha256': digest,
+        'size': len(data),
+        'fetched_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    })
+    result.update(status='updated' if changed else 'unchanged', sha256=digest,
+                  seconds=time.monotonic() - started)
+    return result
+
+
+def _extract(pdf_path):
+    """Process-pool worker: extract field metadata from a stored template"""
+    from extract_pdf_fields import extract_fields_from_bytes
+
+    with open(pdf_path, 'rb') as f:
+        return extract_fields_from_bytes(f.read())
+
+
+async def _refresh_one(session, store, url, semaphore, pool):
+    result = await fetch_one(session, store, url, semaphore)
+    if pool is None or result['status'] == 'error':
+        return result
+    if result['status'] != 'updated' and os.path.exists(store.path(result['key'], '.fields.json')):
+        return result
+    # Extraction starts as soon as this download lands, overlapping slower fetches
+    loop = asyncio.get_running_loop()
+    try:
+        fields = await loop.run_in_executor(pool, _extract, store.path(result['key'], '.pdf'))
+    except Exception as e:
+        result['extract_error'] = str(e)
+        return result
+    store.write_json(result['key'], '.fields.json', fields)
+    result['fields'] = len(fields)
+    return result
+
+
+async def refresh_templates(urls, store_dir=DEFAULT_STORE, concurrency=DEFAULT_CONCURRENCY, extract=True):
+    """Fetch every URL concurrently and re-extract fields for the ones that changed"""
+    store = TemplateStore(store_dir)
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT_SECONDS)
+    urls = list(dict.fromkeys(urls))
+
+    pool = ProcessPoolExecutor(max_workers=min(len(urls), os.cpu_count() or 1)) if extract and urls else None
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            return await asyncio.gather(*(_refresh_one(session, store, url, semaphore, pool) for url in urls))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+async def self_check(concurrency=3):
+    """Run refresh_templates against a local aiohttp server. Returns [(check, ok, detail)]
+
+    Covers plain 200 downloads, 304 revalidation via ETag and via
+    If-Modified-Since, retries on 5xx (and giving up after RETRIES), and that
+    no more than `concurrency` requests are in flight at once.
+    """
+    body = b'%PDF-1.4\n% fetch_templates self check\n'
+    etag = '"self-check-v1"'
+    last_modified = 'Mon, 05 Jan 2026 00:00:00 GMT'
+    hits = collections.Counter()
+    last_headers = {}
+    in_flight = {'now': 0, 'max': 0}
+
+    async def handler(request):
+        name = request.match_info['name']
+        hits[name] += 1
+        last_headers[name] = request.headers
+        if name.startswith('slow'):
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            try:
+                await asyncio.sleep(0.05)
+            finally:
+                in_flight['now'] -= 1
+        elif name == 'down' or (name == 'flaky' and hits[name] < RETRIES):
+            return web.Response(status=503)
+        elif name == 'etag':
+            if request.headers.get('If-None-Match') == etag:
+                return web.Response(status=304)
+            return web.Response(body=body, headers={'ETag': etag})
+        elif name == 'modified':
+            if request.headers.get('If-Modified-Since') == last_modified:
+                return web.Response(status=304)
+            return web.Response(body=body, headers={'Last-Modified': last_modified})
+        return web.Response(body=body)
+
+    app = web.Application()
+    app.router.add_get('/{name}.pdf', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    checks = []
+    try:
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+
+        def url(name):
+            return f"http://127.0.0.1:{port}/{name}.pdf"
+
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = TemplateStore(store_dir)
+            validated = [url('etag'), url('modified')]
+            first = await refresh_templates(validated, store_dir, extract=False)
+            stored = all(r['status'] == 'updated' and store.read_pdf(r['key']) == body for r in first)
+            checks.append(('200 downloads are stored', stored, ', '.join(r['status'] for r in first)))
+
+            etag_result, modified_result = await refresh_templates(validated, store_dir, extract=False)
+            checks.append(('304 via ETag / If-None-Match',
+                           etag_result['status'] == 'not_modified'
+                           and last_headers['etag'].get('If-None-Match') == etag,
+                           etag_result['status']))
+            checks.append(('304 via If-Modified-Since',
+                           modified_result['status'] == 'not_modified'
+                           and last_headers['modified'].get('If-Modified-Since') == last_modified,
+                           modified_result['status']))
+
+            flaky, down = await refresh_templates([url('flaky'), url('down')], store_dir, extract=False)
+            checks.append(('retries a 5xx until it succeeds', flaky['status'] == 'updated' and hits['flaky'] == RETRIES,
+                           f"{flaky['status']} after {hits['flaky']} requests"))
+            checks.append((f'gives up after {RETRIES} attempts', down['status'] == 'error' and hits['down'] == RETRIES,
+                           f"{down['status']} after {hits['down']} requests"))
+
+            slow = [url(f'slow{i}') for i in range(4 * concurrency)]
+            results = await refresh_templates(slow, store_dir, concurrency=concurrency, extract=False)
+            checks.append((f'at most {concurrency} requests in flight',
+                           all(r['status'] == 'updated' for r in results) and 1 < in_flight['max'] <= concurrency,
+                           f"max {in_flight['max']} of {len(slow)}"))
+    finally:
+        await runner.cleanup()
+    return checks
+
+
+async def list_supabase_templates():
+    """Read template URLs from the form_templates table via the Supabase REST API"""
+    base = os.environ.get('VITE_SUPABASE_URL') or os.environ.get('SUPABASE_URL')
+    key = os.environ.get('VITE_SUPABASE_ANON_KEY') or os.environ.get('SUPABASE_ANON_KEY')
+    if not base or not key:
+        print('Set VITE_SUPABASE_URL and VITE_SUPABASE_ANON_KEY to list form_templates')
+        sys.exit(1)
+    headers = {'apikey': key, 'Authorization': f'Bearer {key}'}
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT_SECONDS)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.get(f"{base.rstrip('/')}/rest/v1/form_templates?select=name,pdf_url",
+                               headers=headers) as response:
+            response.raise_for_status()
+            rows = await response.json()
+    return [row['pdf_url'] for row in rows if row.get('pdf_url')]
+
+
+async def run(args):
+    if args.self_check:
+        checks = await self_check()
+        print("=== FETCH SELF CHECK ===")
+        for name, ok, detail in checks:
+            print(f"  [{'ok' if ok else 'FAIL'}] {name} ({detail})")
+        if not all(ok for _, ok, _ in checks):
+            sys.exit(1)
+        return
+
+    urls = list(args.urls)
+    if args.supabase:
+        urls.extend(await list_supabase_templates())
+    if not urls:
+        print('No template URLs given')
+        sys.exit(1)
+
+    started = time.monotonic()
+    results = await refresh_templates(urls, args.store, args.concurrency, extract=not args.no_extract)
+    elapsed = time.monotonic() - started
+
+    print(f"=== TEMPLATE REFRESH ({len(results)} templates, {elapsed:.2f}s) ===")
+    for r in results:
+        line = f"  [{r['status']}] {r['url']} ({r['seconds']:.2f}s)"
+        if 'fields' in r:
+            line += f" fields={r['fields']}"
+        if r.get('error') or r.get('extract_error'):
+            line += f" error={r.get('error') or r.get('extract_error')}"
+        print(line)
+    print(f"Store: {os.path.abspath(args.store)}")
+    if any(r['status'] == 'error' for r in results):
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrently refresh PDF templates and their field metadata')
+    parser.add_argument('urls', nargs='*', help='Template URLs')
+    parser.add_argument('--supabase', action='store_true', help='Also fetch every form_templates.pdf_url')
+    parser.add_argument('--store', default=DEFAULT_STORE)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--no-extract', action='store_true')
+    parser.add_argument('--self-check', action='store_true',
+                        help='Check 200/304/retry/concurrency handling against a local server and exit')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Maintenance for the monthly form_events partitions (migrations/partition_form_events.sql).
+
+Commands:
+  status    list partitions with bounds, row counts and size; warn about rows
+            sitting in form_events_default
+  create    create partitions for the current month and --ahead months after it
+  archive   for every monthly partition older than --older-than months:
+            export it to <out>/form_events_YYYY_MM.jsonl.zst (or .jsonl.gz) plus a
+            .meta.json manifest, verify the archive, then detach and drop the partition
+  restore   load an archive back into form_events (re-creating its partition)
+
+Run `create` from cron (e.g. daily) so inserts never fall into the default partition.
+
+Usage:
+  python scripts/form_events_partitions.py status [dsn]
+  python scripts/form_events_partitions.py create [dsn] [--ahead 3]
+  python scripts/form_events_partitions.py archive [dsn] [--older-than 12] [--out form_events_archive]
+                                           [--format zst|gz] [--keep-detached] [--dry-run]
+  python scripts/form_events_partitions.py restore archive.jsonl.zst [dsn]
+"""
+
+import argparse
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+
+from pg_common import connect, get_dsn
+
+PARENT = 'form_events'
+DEFAULT_PARTITION = 'form_events_default'
+PARTITION_RE = re.compile(r'^form_events_(\d{4})_(\d{2})$')
+COLUMNS = ['id', 'form_id', 'event_type', 'actor_id', 'payload', 'created_at']
+FORMATS = {'zst': '.jsonl.zst', 'gz': '.jsonl.gz'}
+
+
+def month_start(day, offset=0):
+    """First day of the month `offset` months after `day`"""
+    index = day.year * 12 + day.month - 1 + offset
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_month(name):
+    match = PARTITION_RE.match(name)
+    return datetime.date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def list_partitions(cur):
+    """[(name, bound_expression)] for the attached partitions of form_events"""
+    cur.execute('''
+        select c.relname, pg_get_expr(c.relpartbound, c.oid)
+        from pg_inherits i
+        join pg_class c on c.oid = i.inhrelid
+        where i.inhparent = %s::regclass
+        order by c.relname''', (PARENT,))
+    return cur.fetchall()
+
+
+def open_archive(path, mode):
+    """Text-mode handle on a .jsonl.zst / .jsonl.gz archive"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    try:
+        import zstandard
+    except Exception:
+        print('zstandard not installed. Please run: pip install zstandard (or use --format gz)')
+        sys.exit(1)
+    if mode == 'w':
+        raw = zstandard.ZstdCompressor(level=10).stream_writer(open(path, 'wb'), closefd=True)
+    else:
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def cmd_status(cur, args):
+    print("=== FORM_EVENTS PARTITIONS ===")
+    for name, bound in list_partitions(cur):
+        cur.execute(f'select count(*), pg_total_relation_size(%s::regclass) from {name}', (name,))
+        rows, size = cur.fetchone()
+        print(f"  {name:<24} {rows:>10} rows {size / 1048576:>9.1f} MiB  {bound}")
+        if name == DEFAULT_PARTITION and rows:
+            print(f"  WARNING: {rows} rows in {DEFAULT_PARTITION}; run `create` to move them into monthly partitions")
+
+
+def cmd_create(cur, args):
+    today = datetime.date.today()
+    print(f"=== CREATE PARTITIONS (through {month_start(today, args.ahead):%Y-%m}) ===")
+    existing = {name for name, _ in list_partitions(cur)}
+    for offset in range(args.ahead + 1):
+        cur.execute('select form_events_create_partition(%s)', (month_start(today, offset),))
+        name = cur.fetchone()[0]
+        print(f"  {name}: {'exists' if name in existing else 'created'}")
+
+
+def export_partition(conn, name, path):
+    """Stream a partition into an archive; returns the manifest"""
+    digest = hashlib.sha256()
+    rows = 0
+    first_id = last_id = None
+    tmp = os.path.join(os.path.dirname(path), '.' + os.path.basename(path))
+    with conn.transaction(), conn.cursor(name=f'export_{name}') as cur, open_archive(tmp, 'w') as out:
+        cur.itersize = 5000
+        cur.execute(f'select {", ".join(COLUMNS)} from {name} order by id')
+        for record in cur:
+            line = json.dumps(dict(zip(COLUMNS, record)), default=str, separators=(',', ':')) + '\n'
+            out.write(line)
+            digest.update(line.encode('utf-8'))
+            rows += 1
+            first_id = record[0] if first_id is None else first_id
+            last_id = record[0]
+    os.replace(tmp, path)
+    return {'partition': name, 'rows': rows, 'first_id': first_id, 'last_id': last_id,
+            'sha256': digest.hexdigest(), 'archived_at': datetime.datetime.now(datetime.timezone.utc).isoformat()}
+
+
+def verify_archive(path, manifest):
+    digest = hashlib.sha256()
+    rows = 0
+    with open_archive(path, 'r') as f:
+        for line in f:
+            digest.update(line.encode('utf-8'))
+            rows += 1
+    return rows == manifest['rows'] and digest.hexdigest() == manifest['sha256']
+
+
+def cmd_archive(cur, args):
+    conn = cur.connection
+    cutoff = month_start(datetime.date.today(), -args.older_than)
+    old = sorted((partition_month(name), name) for name, _ in list_partitions(cur)
+                 if partition_month(name) and partition_month(name) < cutoff)
+    print(f"=== ARCHIVE PARTITIONS (before {cutoff:%Y-%m}) ===" + (" (dry run)" if args.dry_run else ""))
+    if not old:
+        print("  nothing to archive")
+        return
+    os.makedirs(args.out, exist_ok=True)
+    for _, name in old:
+        path = os.path.join(args.out, name + FORMATS[args.format])
+        if args.dry_run:
+            cur.execute(f'select count(*) from {name}')
+            print(f"  {name}: {cur.fetchone()[0]} rows -> {path}")
+            continue
+        manifest = export_partition(conn, name, path)
+        if not verify_archive(path, manifest):
+            print(f"  {name}: archive verification failed, partition left attached")
+            sys.exit(1)
+        with open(path + '.meta.json', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        with conn.transaction():
+            cur.execute(f'alter table {PARENT} detach partition {name}')
+            if not args.keep_detached:
+                cur.execute(f'drop table {name}')
+        size = os.path.getsize(path)
+        print(f"  {name}: {manifest['rows']} rows -> {path} ({size / 1048576:.1f} MiB), "
+              f"{'detached' if args.keep_detached else 'dropped'}")
+
+
+def cmd_restore(cur, args):
+    conn = cur.connection
+    match = re.search(r'form_events_(\d{4})_(\d{2})', os.path.basename(args.archive))
+    if not match:
+        print(f"Cannot tell the month from {args.archive}")
+        sys.exit(1)
+    month = datetime.date(int(match.group(1)), int(match.group(2)), 1)
+    rows = 0
+    with conn.transaction():
+        cur.execute('select form_events_create_partition(%s)', (month,))
+        name = cur.fetchone()[0]
+        with open_archive(args.archive, 'r') as f, cur.copy(
+                f"COPY {PARENT} ({', '.join(COLUMNS)}) FROM STDIN") as copy:
+            for line in f:
+                record = json.loads(line)
+                record['payload'] = json.dumps(record['payload']) if record['payload'] is not None else None
+                copy.write_row([record[c] for c in COLUMNS])
+                rows += 1
+    print("=== RESTORE ===")
+    print(f"  {rows} rows from {args.archive} -> {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain monthly form_events partitions')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    status = sub.add_parser('status')
+    status.add_argument('dsn', nargs='?')
+
+    create = sub.add_parser('create')
+    create.add_argument('dsn', nargs='?')
+    create.add_argument('--ahead', type=int, default=3, help='Months to create beyond the current one')
+
+    archive = sub.add_parser('archive')
+    archive.add_argument('dsn', nargs='?')
+    archive.add_argument('--older-than', type=int, default=12, help='Archive partitions this many months old')
+    archive.add_argument('--out', default='form_events_archive')
+    archive.add_argument('--format', choices=sorted(FORMATS), default='zst')
+    archive.add_argument('--keep-detached', action='store_true', help='Detach but do not drop the partition')
+    archive.add_argument('--dry-run', action='store_true')
+
+    restore = sub.add_parser('restore')
+    restore.add_argument('archive')
+    restore.add_argument('dsn', nargs='?')
+
+    args = parser.parse_args()
+    commands = {'status': cmd_status, 'create': cmd_create, 'archive': cmd_archive, 'restore': cmd_restore}
+    with connect(get_dsn(args.dsn), autocommit=True) as conn, conn.cursor() as cur:
+        commands[args.command](cur, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,51 +3,8 @@ import json
 from pathlib import Path
 
 root = Path('')
-kyc = (root / 'src' / 'components' / 'KYCForm.jsx').read_text()
-pdf_fields = json.loads((root / 'src' / 'data' / 'kyc_pdf_fields.json').read_text())
 
-# Extract register('...') and register("...") occurrences
-regs = re.findall(r"register\(\s*'([^']+)'\s*\)|register\(\s*\"([^\"]+)\"\s*\)", kyc)
-logical_fields = []
-for a,b in regs:
-    name = a or b
-    if name not in logical_fields:
-        logical_fields.append(name)
-
-# Helper normalize
-def norm(s):
-    return re.sub(r"[^a-z0-9]", "", s.lower())
-
-pdf_names = [f['name'] for f in pdf_fields]
-pdf_map = {f['name']: f['type'] for f in pdf_fields}
-
-mapping = {}
-for lf in logical_fields:
-    best = None
-    best_score = 0
-    ln = norm(lf)
-    for pn in pdf_names:
-        pn_norm = norm(pn)
-        # score: common substring length
-        score = 0
-        if ln in pn_norm or pn_norm in ln:
-            score = len(ln)
-        else:
-            # token overlap
-            ln_tokens = set(re.findall(r"[a-z0-9]+", ln))
-            pn_tokens = set(re.findall(r"[a-z0-9]+", pn_norm))
-            score = len(ln_tokens & pn_tokens)
-        if score > best_score:
-            best_score = score
-            best = pn
-    # fallback: exact match
-    if not best:
-        best = lf
-    ftype = 'text'
-    pdf_type = pdf_map.get(best, '')
-    if pdf_type == 'Btn':
-        ftype = 'checkbox'
-    mapping[lf] = { 'type': ftype, 'pdf_field': best }
+REGISTER_RE = re.compile(r"register\(\s*'([^']+)'\s*\)|register\(\s*\"([^\"]+)\"\s*\)")
 
 # Post-adjust common logical names
 renames = {
@@ -77,11 +34,6 @@ renames = {
     'bank_account': 'Account Number',
 }
 
-for k,v in renames.items():
-    if k in mapping:
-        mapping[k]['pdf_field'] = v
-        mapping[k]['type'] = 'text' if pdf_map.get(v,'')=='Tx' else 'checkbox'
-
 # Additional manual tweaks for known fields
 manual = {
     'title': { 'type': 'radio_group', 'pdf_field': 'Mr', 'value_map': {'Mr.':'Mr','Mrs.':'Mrs','Miss':'Miss','Ms.':'Ms','Dr.':'Dr','Other':'Other'} },
@@ -92,7 +44,67 @@ manual = {
     'passport': { 'type': 'checkbox', 'pdf_field': 'Passport', 'checked_value': 'On' },
     'rrsp': { 'type': 'checkbox', 'pdf_field': 'RRSP', 'checked_value': 'On' },
 }
-for k,v in manual.items():
-    mapping[k] = v
 
-print(json.dumps(mapping, indent=2, ensure_ascii=False))
+# Extract register('...') and register("...") occurrences
+def extract_logical_fields(text):
+    logical_fields = []
+    for a,b in REGISTER_RE.findall(text):
+        name = a or b
+        if name not in logical_fields:
+            logical_fields.append(name)
+    return logical_fields
+
+# Helper normalize
+def norm(s):
+    return re.sub(r"[^a-z0-9]", "", s.lower())
+
+def map_logical_field(lf, pdf_names, pdf_map):
+    """Best-guess mapping entry for one logical field (renames and manual tweaks applied)"""
+    if lf in manual:
+        return dict(manual[lf])
+    best = None
+    best_score = 0
+    ln = norm(lf)
+    for pn in pdf_names:
+        pn_norm = norm(pn)
+        # score: common substring length
+        score = 0
+        if ln in pn_norm or pn_norm in ln:
+            score = len(ln)
+        else:
+            # token overlap
+            ln_tokens = set(re.findall(r"[a-z0-9]+", ln))
+            pn_tokens = set(re.findall(r"[a-z0-9]+", pn_norm))
+            score = len(ln_tokens & pn_tokens)
+        if score > best_score:
+            best_score = score
+            best = pn
+    # fallback: exact match
+    if not best:
+        best = lf
+    ftype = 'text'
+    pdf_type = pdf_map.get(best, '')
+    if pdf_type == 'Btn':
+        ftype = 'checkbox'
+    entry = { 'type': ftype, 'pdf_field': best }
+    if lf in renames:
+        v = renames[lf]
+        entry['pdf_field'] = v
+        entry['type'] = 'text' if pdf_map.get(v,'')=='Tx' else 'checkbox'
+    return entry
+
+def generate_mapping(kyc_text, pdf_fields):
+    pdf_names = [f['name'] for f in pdf_fields]
+    pdf_map = {f['name']: f['type'] for f in pdf_fields}
+    mapping = {}
+    for lf in extract_logical_fields(kyc_text):
+        mapping[lf] = map_logical_field(lf, pdf_names, pdf_map)
+    for k,v in manual.items():
+        mapping[k] = v
+    return mapping
+
+if __name__ == '__main__':
+    kyc = (root / 'src' / 'components' / 'KYCForm.jsx').read_text()
+    pdf_fields = json.loads((root / 'src' / 'data' / 'kyc_pdf_fields.json').read_text())
+    mapping = generate_mapping(kyc, pdf_fields)
+    print(json.dumps(mapping, indent=2, ensure_ascii=False))
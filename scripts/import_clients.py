@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Bulk client import.
+
+Reads clients from CSV or JSONL, maps columns through
+src/data/client_form_field_mapping.json (field_name / supabase_column, type,
+required), normalizes them the way ClientForm.jsx does before its insert, and
+streams valid rows into Postgres with COPY in batches.
+
+Normalization (mirrors ClientForm.jsx onSubmit):
+  - tax_residency / investments / approval_documents become text[]; list cells
+    in CSV are separated by ';' (or '|'). An 'Other' entry is replaced by the
+    other_countries / other_investments / approval_other column, as the form
+    does with its "other" inputs. tax_residency defaults to ['Canada'].
+  - numeric fields are parsed as numbers (blank -> NULL); net_worth is
+    fixed_assets + liquid_assets - liabilities when not given.
+  - date fields must be YYYY-MM-DD; checkbox fields accept true/false/yes/no/1/0.
+  - a column missing from a record (a JSONL key, a CSV header) is left out of
+    the COPY so its database default applies; blank CSV cells are still NULL.
+
+A batch the database rejects (e.g. a duplicate key) is retried with a
+savepoint per row: the accepted rows are committed and each refused row goes to
+the error report with its line number.
+
+Usage:
+  python scripts/import_clients.py clients.csv [dsn] [--dry-run] [--errors errors.jsonl]
+                                   [--batch-size 1000] [--on-error skip|abort] [--table clients]
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import sys
+from decimal import Decimal, InvalidOperation
+
+from pg_common import CLIENT_MAPPING, PG_TYPES, connect, get_dsn
+
+# ClientForm.jsx "other" inputs that replace an 'Other' array entry
+# (approval_other is split on ';' like approvalOtherText)
+OTHER_SOURCES = {
+    'tax_residency': 'other_countries',
+    'investments': 'other_investments',
+    'approval_documents': 'approval_other',
+}
+DEFAULT_ARRAYS = {'tax_residency': ['Canada']}
+TRUE_VALUES = {'true', 't', 'yes', 'y', '1', 'on'}
+FALSE_VALUES = {'false', 'f', 'no', 'n', '0', 'off', ''}
+
+
+class RowError(ValueError):
+    def __init__(self, field, value, message):
+        super().__init__(message)
+        self.field = field
+        self.value = value
+
+
+class ClientSchema:
+    """Column rules derived from client_form_field_mapping.json"""
+
+    def __init__(self, mapping):
+        self.columns = []
+        self.types = {}
+        self.required = []
+        self.aliases = {}
+        for fields in mapping['client_form_fields'].values():
+            for name, spec in fields.items():
+                column = spec.get('supabase_column') or name
+                self.columns.append(column)
+                self.types[column] = spec.get('type', 'text')
+                if spec.get('required'):
+                    self.required.append(column)
+                # Accept both the column and the UI field name as input headers
+                self.aliases[column] = column
+                self.aliases[spec.get('field_name', name)] = column
+
+    @classmethod
+    def load(cls, path=CLIENT_MAPPING):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def pg_type(self, column):
+        return PG_TYPES.get(self.types[column], 'text')
+
+
+def _split_list(value):
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    text = str(value)
+    sep = ';' if ';' in text else '|' if '|' in text else None
+    parts = text.split(sep) if sep else [text]
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _number(column, value):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        number = Decimal(str(value).replace(',', '').replace('$', '').strip())
+    except InvalidOperation:
+        raise RowError(column, value, 'not a number')
+    if not number.is_finite():
+        raise RowError(column, value, 'not a finite number')
+    return number
+
+
+def _date(column, value):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        return datetime.date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        raise RowError(column, value, 'expected YYYY-MM-DD')
+
+
+def _boolean(column, value):
+    if isinstance(value, bool) or value is None:
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise RowError(column, value, 'expected true/false')
+
+
+def normalize_row(schema, raw):
+    """Raw input record -> {column: value} ready for COPY. Raises RowError"""
+    record = {}
+    extras = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        column = schema.aliases.get(key.strip())
+        if column:
+            record[column] = value
+        else:
+            extras[key.strip()] = value
+
+    row = {}
+    for column in schema.columns:
+        if column not in record and column not in DEFAULT_ARRAYS:
+            # absent from the input: leave it out of COPY so the column default applies
+            continue
+        value = record.get(column)
+        ui_type = schema.types[column]
+        if ui_type == 'checkbox_array':
+            items = _split_list(value)
+            if not items and column in DEFAULT_ARRAYS:
+                items = list(DEFAULT_ARRAYS[column])
+            source = OTHER_SOURCES.get(column)
+            if source:
+                other = _split_list(extras.get(source))
+                items = [x for item in items for x in (other if item == 'Other' else [item])]
+            row[column] = items
+        elif ui_type == 'number':
+            row[column] = _number(column, value)
+        elif ui_type == 'date':
+            row[column] = _date(column, value)
+        elif ui_type == 'checkbox':
+            row[column] = _boolean(column, value)
+        else:
+            text = None if value is None else str(value).strip()
+            row[column] = text or None
+
+    if row.get('net_worth') is None and any(row.get(c) is not None for c in ('fixed_assets', 'liquid_assets', 'liabilities')):
+        row['net_worth'] = ((row.get('fixed_assets') or 0) + (row.get('liquid_assets') or 0)
+                            - (row.get('liabilities') or 0)).quantize(Decimal(1))
+
+    for column in schema.required:
+        if not row.get(column):
+            raise RowError(column, record.get(column), 'required')
+    return row
+
+
+def read_records(path):
+    """Yield (line_number, dict) from a CSV or JSONL file"""
+    if path.endswith('.jsonl') or path.endswith('.ndjson'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for n, line in enumerate(f, 1):
+                if line.strip():
+                    yield n, json.loads(line)
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+
+
+def copy_rows(conn, table, schema, rows):
+    """COPY rows that all have the same columns, in the current transaction"""
+    columns = list(rows[0])
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            copy.set_types([schema.pg_type(c) for c in columns])
+            for row in rows:
+                copy.write_row([row[c] for c in columns])
+
+
+def copy_batch(conn, table, schema, rows):
+    """COPY one batch in its own transaction; one COPY per distinct column set"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row), []).append(row)
+    with conn.transaction():
+        for group in groups.values():
+            copy_rows(conn, table, schema, group)
+
+
+def copy_rows_individually(conn, table, schema, batch):
+    """Retry a rejected batch with a savepoint per row, committing the rows the
+    database accepts. Returns [(line, raw, error)] for the ones it refuses"""
+    rejected = []
+    with conn.transaction():
+        for line, row, raw in batch:
+            try:
+                with conn.transaction():
+                    copy_rows(conn, table, schema, [row])
+            except Exception as e:
+                rejected.append((line, raw, e))
+    return rejected
+
+
+def run_import(args):
+    schema = ClientSchema.load()
+
+    errors_out = open(args.errors, 'w', encoding='utf-8') if args.errors else None
+    conn = None if args.dry_run else connect(get_dsn(args.dsn))
+    stats = {'read': 0, 'valid': 0, 'invalid': 0, 'inserted': 0, 'failed_batches': 0, 'rejected': 0}
+    batch = []
+
+    def report(line, field, value, message, raw):
+        if errors_out:
+            errors_out.write(json.dumps({'line': line, 'field': field, 'value': value, 'error': message,
+                                         'row': raw}, default=str) + '\n')
+        elif stats['invalid'] + stats['rejected'] <= 20:
+            print(f"  line {line}: {field}: {message} ({value!r})")
+
+    def flush():
+        """COPY the pending batch; returns True when the database refused any row"""
+        rejected = []
+        if batch and conn is not None:
+            try:
+                copy_batch(conn, args.table, schema, [r for _, r, _ in batch])
+                stats['inserted'] += len(batch)
+            except Exception:
+                # find the offending rows and keep the rest
+                stats['failed_batches'] += 1
+                rejected = copy_rows_individually(conn, args.table, schema, batch)
+                stats['rejected'] += len(rejected)
+                stats['inserted'] += len(batch) - len(rejected)
+                for line, raw, e in rejected:
+                    report(line, getattr(getattr(e, 'diag', None), 'column_name', None), None,
+                           f"rejected by database: {str(e).splitlines()[0]}", raw)
+        batch.clear()
+        return bool(rejected)
+
+    try:
+        for line, raw in read_records(args.input):
+            stats['read'] += 1
+            if stats['read'] == 1:
+                ignored = [k for k in raw if k and k.strip() not in schema.aliases
+                           and k.strip() not in OTHER_SOURCES.values()]
+                if ignored:
+                    print(f"  ignoring unknown columns: {', '.join(ignored)}")
+            try:
+                row = normalize_row(schema, raw)
+            except RowError as e:
+                stats['invalid'] += 1
+                report(line, e.field, e.value, str(e), raw)
+                if args.on_error == 'abort':
+                    break
+                continue
+            stats['valid'] += 1
+            batch.append((line, row, raw))
+            if len(batch) >= args.batch_size and flush() and args.on_error == 'abort':
+                break
+        flush()
+    finally:
+        if conn is not None:
+            conn.close()
+        if errors_out:
+            errors_out.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import clients with COPY')
+    parser.add_argument('input', help='CSV or JSONL file')
+    parser.add_argument('dsn', nargs='?')
+    parser.add_argument('--table', default='clients')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--dry-run', action='store_true', help='Validate only; no database connection')
+    parser.add_argument('--errors', help='Write rejected rows here as JSONL')
+    parser.add_argument('--on-error', choices=['skip', 'abort'], default='skip')
+    args = parser.parse_args()
+
+    stats = run_import(args)
+
+    print("=== CLIENT IMPORT ===" + (" (dry run)" if args.dry_run else ""))
+    print(f"Rows read: {stats['read']}")
+    print(f"Valid: {stats['valid']}")
+    print(f"Invalid: {stats['invalid']}")
+    if not args.dry_run:
+        print(f"Inserted: {stats['inserted']}")
+        print(f"Rejected by database: {stats['rejected']}")
+        if stats['failed_batches']:
+            print(f"Batches retried row by row: {stats['failed_batches']}")
+    if args.errors:
+        print(f"Error report: {args.errors}")
+    if stats['invalid'] or stats['rejected']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Python port of the pdfData construction in src/utils/kycFiller.js (fillKYCPDF).
+
+build_pdf_data() applies src/data/kyc_field_mappings.json the same way the
+browser does, in the same order, so later writes to a PDF field win exactly as
+they do there. It also records which logical field produced each PDF field.
+expected_field_state() mirrors how fillPDF (src/utils/pdfGenerator.js) applies
+one value to a text field, checkbox or radio group.
+
+Keep this in step with kycFiller.js when the fill rules change.
+"""
+
+import json
+import math
+import os
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA_DIR = os.path.join(ROOT, 'src', 'data')
+KYC_MAPPINGS = os.path.join(DATA_DIR, 'kyc_field_mappings.json')
+FIELD_INDEX = os.path.join(DATA_DIR, 'kyc_field_index.json')
+
+# kycFiller.js "handle radio buttons" blocks: value_map[value] -> that Btn set to On
+SELECTED_BUTTON_FIELDS = ['language_preference', 'account_type', 'plan_status', 'plan_type',
+                          'time_horizon', 'investment_purpose']
+INCOME_FIELDS = ['annual_income', 'joint_annual_income']
+CITIZENSHIP_BUTTONS = {'Canadian': 'Canadian', 'Permanent Resident': 'Permanent Resident', 'Other': 'Other'}
+HOLDINGS_FIELDS = ['holdings_bonds', 'holdings_stocks', 'holdings_mutual_funds', 'holdings_etfs',
+                   'holdings_gics', 'holdings_real_estate']
+APPROVAL_BUTTONS = {"Driver's License": 'Drivers License', 'Birth Certificate': 'Birth Certificate',
+                    'Passport': 'Passport', 'Other': 'Other_2'}
+TAX_RESIDENCY_BUTTONS = {'Canada': 'Tax Resident Canada', 'US': 'Tax Resident US', 'Other': 'Other_3'}
+INCOME_BUCKETS = [(25000, '<$25,000'), (50000, '$25,000-$49,999'), (75000, '$50,000-$74,999'),
+                  (100000, '$75,000-$99,999'), (125000, '$100,000-$124,999'),
+                  (200000, '$125,000-$199,999'), (1000000, '$200,000-$999,999')]
+# fillPDF checks a checkbox only for true or these strings
+CHECKED_STRINGS = ('On', 'Yes', '1')
+
+
+def load_rules(mappings_path=KYC_MAPPINGS, index_path=FIELD_INDEX):
+    """(kyc_field_mappings, pdf_field_types, fallback_fields) as kycFiller.js imports them"""
+    with open(mappings_path, 'r') as f:
+        mappings = json.load(f)
+    with open(index_path, 'r') as f:
+        index = json.load(f)
+    return mappings, index.get('pdf_field_types', {}), index.get('fallback_fields', {})
+
+
+def js_truthy(value):
+    if value is None or value is False:
+        return False
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value != 0 and not (isinstance(value, float) and math.isnan(value))
+    if isinstance(value, str):
+        return value != ''
+    return True
+
+
+def js_string(value):
+    """String(value) as JavaScript renders JSON values"""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e21:
+            return str(int(value))
+        return repr(value)
+    if isinstance(value, list):
+        return ','.join('' if v is None else js_string(v) for v in value)
+    if isinstance(value, dict):
+        return '[object Object]'
+    return str(value)
+
+
+def js_number(value):
+    """Number(value); None when the result is not finite"""
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return 0.0
+        if '_' in text:
+            return None
+        try:
+            number = float(text)
+        except ValueError:
+            return None
+    else:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def bucket_annual_income(value, mappings):
+    if value is None:
+        return value
+    if isinstance(value, str) and value in ((mappings.get('annual_income') or {}).get('value_map') or {}):
+        return value
+    number = js_number(value)
+    if number is None:
+        return value
+    for limit, label in INCOME_BUCKETS:
+        if number < limit:
+            return label
+    return '$1M+'
+
+
+def build_pdf_data(form_data, other_countries=(), other_investments=(), rules=None):
+    """form data -> ({pdf_field: value}, {pdf_field: logical field that wrote it last})"""
+    mappings, field_types, fallback = rules or load_rules()
+    data = dict(form_data)
+    data['annual_income'] = bucket_annual_income(form_data.get('annual_income'), mappings)
+    pdf_data = {}
+    sources = {}
+
+    def put(pdf_field, value, source):
+        pdf_data[pdf_field] = value
+        sources[pdf_field] = source
+
+    for logical, mapping in mappings.items():
+        if not isinstance(mapping, dict) or not mapping.get('pdf_field'):
+            continue
+        pdf_name = mapping['pdf_field']
+        value = data.get(logical)
+        if value is None:
+            continue
+        checked = mapping.get('checked_value') or 'On'
+        if mapping.get('type') == 'checkbox':
+            put(pdf_name, checked if js_truthy(value) else (mapping.get('unchecked_value') or 'Off'), logical)
+        elif mapping.get('type') == 'radio_group' and mapping.get('value_map') is not None:
+            mapped = mapping['value_map'].get(js_string(value)) or js_string(value)
+            if field_types.get(mapped) == 'Btn':
+                put(mapped, checked, logical)
+            else:
+                put(pdf_name, mapped, logical)
+                put(mapped, checked, logical)
+        elif mapping.get('type') == 'array':
+            if isinstance(value, list) and value:
+                put(pdf_name, ', '.join(js_string(v) for v in value), logical)
+            elif isinstance(value, str) and value:
+                put(pdf_name, value, logical)
+        else:
+            put(pdf_name, js_string(value), logical)
+
+    title_map = (mappings.get('title') or {}).get('value_map')
+    if js_truthy(data.get('title')) and title_map is not None:
+        mapped = title_map.get(js_string(data['title']))
+        if mapped:
+            put(mapped, 'On', 'title')
+
+    for logical in INCOME_FIELDS:
+        mapping = mappings.get(logical) or {}
+        if js_truthy(data.get(logical)) and mapping.get('value_map') is not None:
+            mapped = mapping['value_map'].get(js_string(data[logical])) or js_string(data[logical])
+            put(mapped, mapping.get('checked_value') or 'On', logical)
+            # pdf_field is itself a bucket checkbox; the label would uncheck it
+            if field_types.get(mapping.get('pdf_field', 'undefined')) != 'Btn':
+                put(mapping.get('pdf_field', 'undefined'), mapped, logical)
+
+    for logical in SELECTED_BUTTON_FIELDS:
+        value_map = (mappings.get(logical) or {}).get('value_map')
+        if js_truthy(data.get(logical)) and value_map is not None:
+            mapped = value_map.get(js_string(data[logical]))
+            if mapped:
+                put(mapped, 'On', logical)
+
+    if js_truthy(data.get('citizenship')) and mappings.get('citizenship'):
+        button = CITIZENSHIP_BUTTONS.get(data['citizenship'])
+        if button:
+            put(button, 'On', 'citizenship')
+
+    for logical in HOLDINGS_FIELDS:
+        if js_truthy(data.get(logical)) and mappings.get(logical):
+            put(mappings[logical].get('pdf_field', 'undefined'), 'On', logical)
+
+    if isinstance(data.get('approval_documents'), list):
+        for doc in data['approval_documents']:
+            if doc in APPROVAL_BUTTONS:
+                put(APPROVAL_BUTTONS[doc], 'On', 'approval_documents')
+
+    if isinstance(data.get('tax_residency'), list):
+        for residency, button in TAX_RESIDENCY_BUTTONS.items():
+            if residency in data['tax_residency']:
+                put(button, 'On', 'tax_residency')
+
+    if other_countries:
+        if fallback.get('other_countries'):
+            put(fallback['other_countries'], ', '.join(other_countries), 'other_countries')
+        elif fallback.get('other_text'):
+            put(fallback['other_text'], f"Additional countries: {', '.join(other_countries)}", 'other_countries')
+    if other_investments:
+        if fallback.get('other_investments'):
+            put(fallback['other_investments'], ', '.join(other_investments), 'other_investments')
+        elif fallback.get('other_text') and fallback['other_text'] not in pdf_data:
+            put(fallback['other_text'], f"Additional investments: {', '.join(other_investments)}", 'other_investments')
+
+    for key, value in data.items():
+        if key not in pdf_data:
+            put(key, value, None)
+    return pdf_data, sources
+
+
+def expected_field_state(kind, value, options=()):
+    """What fillPDF leaves in a field of `kind` ('text', 'checkbox', 'radio', other) for `value`.
+
+    Returns the text for text fields, True/False for checkboxes, the selected
+    option (or None when select() would throw) for radio groups, and None for
+    field kinds fillPDF cannot set.
+    """
+    if kind == 'text':
+        return js_string(value) if js_truthy(value) else ''
+    if kind == 'checkbox':
+        return value is True or (isinstance(value, str) and value in CHECKED_STRINGS)
+    if kind == 'radio':
+        if not js_truthy(value):
+            return None
+        option = js_string(value)
+        return option if option in options else None
+    return None
+
+
+def source_form_data(stored):
+    """The form data fillKYCPDF received, recovered from a stored forms.data payload.
+
+    KYCForm.jsx saves tax_residency / approval_documents with 'Other' already
+    replaced by the typed-in entries; put 'Other' back so the Btn rules match.
+    """
+    data = dict(stored)
+    if isinstance(data.get('tax_residency'), list):
+        known = [r for r in data['tax_residency'] if r in TAX_RESIDENCY_BUTTONS and r != 'Other']
+        if len(known) < len(data['tax_residency']) or data.get('other_countries'):
+            known.append('Other')
+        data['tax_residency'] = known
+    if isinstance(data.get('approval_documents'), list):
+        known = [d for d in data['approval_documents'] if d in APPROVAL_BUTTONS and d != 'Other']
+        if len(known) < len(data['approval_documents']):
+            known.append('Other')
+        data['approval_documents'] = known
+    return data
+
+
+def field_references(rules=None):
+    """({pdf_field: {logical fields that can write it}}, {pdf_field: (logical, source)}).
+
+    The second dict holds the names kyc_field_mappings.json cannot patch: button
+    names hardcoded in kycFiller.js (source 'kycFiller.js') and the fallback
+    fields build_field_index.py picks by name search (source 'kyc_field_index.json').
+    """
+    mappings, _, fallback = rules or load_rules()
+    refs = {}
+    for logical, mapping in mappings.items():
+        if not isinstance(mapping, dict):
+            continue
+        names = [mapping.get('pdf_field')] + list((mapping.get('value_map') or {}).values())
+        for name in names:
+            if name:
+                refs.setdefault(name, set()).add(logical)
+    fixed = {}
+    for logical, buttons in (('citizenship', CITIZENSHIP_BUTTONS), ('approval_documents', APPROVAL_BUTTONS),
+                             ('tax_residency', TAX_RESIDENCY_BUTTONS)):
+        for name in buttons.values():
+            fixed[name] = (logical, 'kycFiller.js')
+    for logical in ('other_countries', 'other_investments'):
+        for name in (fallback.get(logical), fallback.get('other_text')):
+            if name:
+                fixed[name] = (logical, 'kyc_field_index.json')
+    for name, (logical, _) in fixed.items():
+        refs.setdefault(name, set()).add(logical)
+    return refs, fixed
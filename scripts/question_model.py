@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Shared in-memory question model for the quiz bank tooling.
+
+Questions are slot-based records instead of dicts. Bank and category names and
+objective tags ("Objective 1.1") are interned; option strings, option tuples
+and explanation bodies are pooled per store, so loading every bank together
+keeps a single copy of each repeated value.
+
+The saving is modest: the current banks repeat little text, and the question,
+option and explanation strings themselves make up most of the footprint. Run
+the module to see the dict vs model numbers (about 87% of the dict size today).
+
+Usage:
+  python scripts/question_model.py [bank.json ...]   # defaults to public/quiz/*.json
+"""
+
+import glob
+import json
+import os
+import re
+import sys
+import tracemalloc
+
+from quiz_bank_diff import iter_bank
+
+QUIZ_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'public', 'quiz')
+
+_objective = re.compile(r'(Objective \d+(?:\.\d+)*)\s*$')
+
+
+class Pool:
+    """Interning pool for values sys.intern can't handle (tuples, long text)"""
+
+    __slots__ = ('_values',)
+
+    def __init__(self):
+        self._values = {}
+
+    def __call__(self, value):
+        if value is None:
+            return None
+        return self._values.setdefault(value, value)
+
+    def __len__(self):
+        return len(self._values)
+
+
+class Question:
+    """One quiz question. `explanation` is rebuilt from its interned parts"""
+
+    __slots__ = ('bank', 'category', 'q', 'options', 'answer', 'body', 'objective')
+
+    def __init__(self, bank, category, q, options, answer, body, objective):
+        self.bank = bank
+        self.category = category
+        self.q = q
+        self.options = options
+        self.answer = answer
+        self.body = body
+        self.objective = objective
+
+    @property
+    def explanation(self):
+        if self.objective is None:
+            return self.body
+        return self.body + self.objective
+
+    @property
+    def correct_option(self):
+        if isinstance(self.answer, int) and 0 <= self.answer < len(self.options):
+            return self.options[self.answer]
+        return None
+
+    def to_dict(self):
+        """Plain dict in the bank file format"""
+        return {
+            'q': self.q,
+            'options': list(self.options),
+            'answer': self.answer,
+            'explanation': self.explanation,
+        }
+
+    def __repr__(self):
+        return f"Question({self.bank!r}, {self.category!r}, {self.q[:40]!r})"
+
+
+class QuestionStore:
+    """Questions from any number of banks sharing one set of interning pools"""
+
+    def __init__(self):
+        self.banks = {}
+        self._text = Pool()
+        self._options = Pool()
+
+    def _str(self, value):
+        """Intern low-cardinality labels (bank, category, objective)"""
+        if value is None:
+            return None
+        return sys.intern(str(value))
+
+    def add(self, bank, category, raw):
+        """Build a Question from a raw bank dict and keep it"""
+        explanation = raw.get('explanation')
+        objective = None
+        if isinstance(explanation, str):
+            m = _objective.search(explanation)
+            if m:
+                objective = self._str(m.group(1))
+                explanation = explanation[:m.start(1)]
+        options = self._options(tuple(self._text(o) for o in raw.get('options') or ()))
+        question = Question(
+            bank=self._str(bank),
+            category=self._str(category),
+            q=raw.get('q'),
+            options=options,
+            answer=raw.get('answer'),
+            body=self._text(explanation),
+            objective=objective,
+        )
+        self.banks.setdefault(question.bank, []).append(question)
+        return question
+
+    def load(self, path, bank=None):
+        """Stream one bank file straight into the store"""
+        bank = bank or os.path.splitext(os.path.basename(path))[0]
+        for category, _, raw in iter_bank(path):
+            self.add(bank, category, raw)
+        return self.banks.get(bank, [])
+
+    def by_category(self, bank):
+        """{category: [Question]} for one bank, in file order"""
+        result = {}
+        for question in self.banks.get(bank, ()):
+            result.setdefault(question.category, []).append(question)
+        return result
+
+    def to_bank_dict(self, bank):
+        return {cat: [q.to_dict() for q in qs] for cat, qs in self.by_category(bank).items()}
+
+    def release_pools(self):
+        """
+        Drop the lookup tables used while loading. Already-loaded questions keep
+        sharing their values; later loads simply stop deduplicating against them.
+        """
+        self._text = Pool()
+        self._options = Pool()
+
+    def __len__(self):
+        return sum(len(qs) for qs in self.banks.values())
+
+    def __iter__(self):
+        for questions in self.banks.values():
+            yield from questions
+
+
+def load_banks(paths=None):
+    """Load bank files (default: every public/quiz/*.json) into one QuestionStore"""
+    if paths is None:
+        paths = sorted(glob.glob(os.path.join(QUIZ_DIR, '*.json')))
+    store = QuestionStore()
+    for path in paths:
+        store.load(path)
+    store.release_pools()
+    return store
+
+
+def main():
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(QUIZ_DIR, '*.json')))
+
+    tracemalloc.start()
+    plain = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            plain.append(json.load(f))
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    del plain
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = load_banks(paths)
+    model_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print("=== QUESTION MODEL ===")
+    print(f"Banks: {len(store.banks)}")
+    print(f"Questions: {len(store)}")
+    print(f"Distinct option tuples: {len({id(q.options) for q in store})}")
+    print(f"Distinct explanation bodies: {len({id(q.body) for q in store})}")
+    print(f"Memory as dicts: {dict_bytes / 1024:.0f} KiB")
+    print(f"Memory as model: {model_bytes / 1024:.0f} KiB ({model_bytes / dict_bytes * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
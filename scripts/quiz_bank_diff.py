@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Quiz Bank Diff / Merge
+Structural diff and three-way merge for quiz bank JSON files
+(public/quiz/*.json: {"<category>": [{"q", "options", "answer", "explanation"}, ...]}).
+
+Questions are matched by content hash first, then by exact stem, then by
+fuzzy stem similarity, so reflowed or lightly edited questions are reported
+as "modified" instead of remove + add.
+
+Usage:
+  python scripts/quiz_bank_diff.py diff <old.json> <new.json> [--json] [--threshold 0.6]
+  python scripts/quiz_bank_diff.py merge <base.json> <ours.json> <theirs.json> [-o merged.json]
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+CHUNK_SIZE = 64 * 1024
+FUZZY_THRESHOLD = 0.6
+MAX_CANDIDATES = 5
+FIELDS = ('q', 'options_answer', 'explanation')
+
+_decoder = json.JSONDecoder()
+_ws = re.compile(r'\s+')
+_tokens = re.compile(r'[a-z0-9]+')
+
+
+# ---------------------------------------------------------------------------
+# Streaming reader
+# ---------------------------------------------------------------------------
+
+class _Stream:
+    """Minimal incremental tokenizer over a quiz bank file"""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed text so the buffer stays bounded by one question
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character (without consuming it)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos}, found '{self.peek()}'")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input as needed"""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number or literal may continue into the next chunk
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_bank(path):
+    """Yield (category, index, question) from a quiz bank without loading it whole"""
+    with open(path, 'r', encoding='utf-8') as f:
+        s = _Stream(f)
+        s.expect('{')
+        if s.peek() == '}':
+            return
+        while True:
+            category = s.value()
+            s.expect(':')
+            s.expect('[')
+            index = 0
+            if s.peek() == ']':
+                s.pos += 1
+            else:
+                while True:
+                    yield category, index, s.value()
+                    index += 1
+                    if s.peek() == ',':
+                        s.pos += 1
+                        continue
+                    s.expect(']')
+                    break
+            if s.peek() == ',':
+                s.pos += 1
+                continue
+            s.expect('}')
+            return
+
+
+# ---------------------------------------------------------------------------
+# Matching
+# ---------------------------------------------------------------------------
+
+def normalize(text):
+    """Lowercase and collapse whitespace so reflowed text compares equal"""
+    return _ws.sub(' ', str(text or '')).strip().lower()
+
+
+def field_values(question):
+    """Comparable view of a question; options and answer change together"""
+    return {
+        'q': normalize(question.get('q')),
+        'options_answer': (tuple(normalize(o) for o in question.get('options') or ()), question.get('answer')),
+        'explanation': normalize(question.get('explanation')),
+    }
+
+
+def content_hash(question):
+    """Hash of the whole question (stem, options, answer, explanation)"""
+    v = field_values(question)
+    payload = json.dumps([v['q'], list(v['options_answer'][0]), v['options_answer'][1], v['explanation']])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def stem_hash(question):
+    return hashlib.sha1(normalize(question.get('q')).encode('utf-8')).hexdigest()
+
+
+class Entry:
+    __slots__ = ('category', 'index', 'order', 'question', 'chash', 'shash')
+
+    def __init__(self, category, index, question, order=0):
+        self.category = category
+        self.index = index
+        self.order = order
+        self.question = question
+        self.chash = content_hash(question)
+        self.shash = stem_hash(question)
+
+
+class BankIndex:
+    """Hash index over one side of a comparison"""
+
+    def __init__(self):
+        self.entries = []
+        self.by_content = defaultdict(list)
+        self.by_stem = defaultdict(list)
+
+    def add(self, entry):
+        i = len(self.entries)
+        self.entries.append(entry)
+        self.by_content[entry.chash].append(i)
+        self.by_stem[entry.shash].append(i)
+        return i
+
+    @classmethod
+    def load(cls, path):
+        idx = cls()
+        for order, (category, index, question) in enumerate(iter_bank(path)):
+            idx.add(Entry(category, index, question, order))
+        return idx
+
+
+def _take(bucket, used):
+    for i in bucket:
+        if i not in used:
+            return i
+    return None
+
+
+def _fuzzy_match(old, unmatched_old, pending_new, threshold):
+    """Pair leftover questions by stem similarity using a token inverted index"""
+    if not unmatched_old or not pending_new:
+        return []
+
+    token_sets = {i: set(_tokens.findall(normalize(old.entries[i].question.get('q')))) for i in unmatched_old}
+    df = Counter(t for ts in token_sets.values() for t in ts)
+    # Tokens shared by most stems ("which", "company") do not discriminate
+    cap = max(2, len(token_sets) // 4)
+    postings = defaultdict(list)
+    for i, ts in token_sets.items():
+        for t in ts:
+            if df[t] <= cap:
+                postings[t].append(i)
+
+    pairs = []
+    used = set()
+    for entry in pending_new:
+        stem = normalize(entry.question.get('q'))
+        hits = Counter()
+        for t in set(_tokens.findall(stem)):
+            for i in postings.get(t, ()):
+                if i not in used:
+                    hits[i] += 1
+        best, best_ratio = None, threshold
+        for i, _ in hits.most_common(MAX_CANDIDATES):
+            sm = SequenceMatcher(None, stem, normalize(old.entries[i].question.get('q')), autojunk=False)
+            if sm.quick_ratio() < best_ratio:
+                continue
+            ratio = sm.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = i, ratio
+        if best is not None:
+            used.add(best)
+            pairs.append((best, entry, best_ratio))
+    return pairs
+
+
+def match_banks(old, new_path, threshold=FUZZY_THRESHOLD):
+    """
+    Stream the new bank against an index of the old one.
+    Returns (pairs, added, removed) where pairs is a list of
+    (old_entry, new_entry, how, similarity).
+    """
+    used = set()
+    pairs = []
+    pending = []
+    for order, (category, index, question) in enumerate(iter_bank(new_path)):
+        entry = Entry(category, index, question, order)
+        i = _take(old.by_content.get(entry.chash, ()), used)
+        how = 'identical'
+        if i is None:
+            i = _take(old.by_stem.get(entry.shash, ()), used)
+            how = 'stem'
+        if i is None:
+            pending.append(entry)
+            continue
+        used.add(i)
+        pairs.append((old.entries[i], entry, how, 1.0))
+
+    unmatched_old = [i for i in range(len(old.entries)) if i not in used]
+    fuzzy = _fuzzy_match(old, unmatched_old, pending, threshold)
+    matched_new = set()
+    for i, entry, ratio in fuzzy:
+        used.add(i)
+        matched_new.add(id(entry))
+        pairs.append((old.entries[i], entry, 'fuzzy', ratio))
+
+    added = [e for e in pending if id(e) not in matched_new]
+    removed = [old.entries[i] for i in range(len(old.entries)) if i not in used]
+    return pairs, added, removed
+
+
+def changed_fields(a, b):
+    va, vb = field_values(a), field_values(b)
+    return [f for f in FIELDS if va[f] != vb[f]]
+
+
+# ---------------------------------------------------------------------------
+# Diff
+# ---------------------------------------------------------------------------
+
+def diff_banks(old_path, new_path, threshold=FUZZY_THRESHOLD):
+    """Compare two banks and return a per-category report"""
+    old = BankIndex.load(old_path)
+    pairs, added, removed = match_banks(old, new_path, threshold)
+
+    report = defaultdict(lambda: {'unchanged': 0, 'added': [], 'removed': [], 'modified': [], 'moved': []})
+    for o, n, how, ratio in pairs:
+        fields = changed_fields(o.question, n.question)
+        cat = report[n.category]
+        if o.category != n.category:
+            cat['moved'].append({'from': o.category, 'index': n.index, 'q': n.question.get('q')})
+        if fields:
+            cat['modified'].append({
+                'index': n.index,
+                'old_index': o.index,
+                'match': how,
+                'similarity': round(ratio, 3),
+                'fields': fields,
+                'q': n.question.get('q'),
+            })
+        elif o.category == n.category:
+            cat['unchanged'] += 1
+    for e in added:
+        report[e.category]['added'].append({'index': e.index, 'q': e.question.get('q')})
+    for e in removed:
+        report[e.category]['removed'].append({'index': e.index, 'q': e.question.get('q')})
+    return dict(report)
+
+
+def _short(text, width=90):
+    text = _ws.sub(' ', str(text or '')).strip()
+    return text if len(text) <= width else text[:width - 3] + '...'
+
+
+def print_diff(report):
+    totals = Counter()
+    for category in sorted(report):
+        r = report[category]
+        counts = {k: (v if isinstance(v, int) else len(v)) for k, v in r.items()}
+        totals.update(counts)
+        print(f"=== {category} ===")
+        print(f"  unchanged: {counts['unchanged']}  modified: {counts['modified']}  "
+              f"added: {counts['added']}  removed: {counts['removed']}  moved: {counts['moved']}")
+        for m in r['modified']:
+            print(f"  ~ [{m['old_index']}->{m['index']}] ({m['match']} {m['similarity']:.2f}; "
+                  f"{', '.join(m['fields'])}) {_short(m['q'])}")
+        for m in r['moved']:
+            print(f"  > [{m['index']}] from '{m['from']}' {_short(m['q'])}")
+        for a in r['added']:
+            print(f"  + [{a['index']}] {_short(a['q'])}")
+        for d in r['removed']:
+            print(f"  - [{d['index']}] {_short(d['q'])}")
+        print()
+    print("=== TOTAL ===")
+    print(f"  unchanged: {totals['unchanged']}  modified: {totals['modified']}  "
+          f"added: {totals['added']}  removed: {totals['removed']}  moved: {totals['moved']}")
+
+
+# ---------------------------------------------------------------------------
+# Three-way merge
+# ---------------------------------------------------------------------------
+
+def _side_changes(base, path, threshold):
+    """Match one side against base: (entries in file order, base id -> entry or None)"""
+    pairs, added, removed = match_banks(base, path, threshold)
+    by_base = {id(o): n for o, n, _, _ in pairs}
+    for o in removed:
+        by_base[id(o)] = None
+    origin = {id(n): o for o, n, _, _ in pairs}
+    entries = sorted([n for _, n, _, _ in pairs] + added, key=lambda e: e.order)
+    return entries, by_base, origin
+
+
+def _merge_question(b, o, t):
+    """Field-level merge of one question; returns (category, question, conflicting fields)"""
+    vb, vo, vt = field_values(b.question), field_values(o.question), field_values(t.question)
+    merged = dict(o.question)
+    conflicts = []
+    for field in FIELDS:
+        if vo[field] == vt[field] or vt[field] == vb[field]:
+            continue
+        if vo[field] != vb[field]:
+            conflicts.append(field)
+        elif field == 'options_answer':
+            merged['options'] = t.question.get('options')
+            merged['answer'] = t.question.get('answer')
+        else:
+            merged[field] = t.question.get(field)
+    category = o.category
+    if o.category == b.category and t.category != b.category:
+        category = t.category
+    return category, merged, conflicts
+
+
+def merge_banks(base_path, ours_path, theirs_path, threshold=FUZZY_THRESHOLD):
+    """
+    Three-way merge of concurrent edits to a quiz bank.
+    Output follows the order of "ours". Conflicting fields keep "ours"; a question
+    edited on one side and deleted on the other keeps the edited copy. Conflicts are
+    returned for review, each with the side it 'kept'.
+    """
+    base = BankIndex.load(base_path)
+    ours, ours_by_base, ours_origin = _side_changes(base, ours_path, threshold)
+    theirs, theirs_by_base, theirs_origin = _side_changes(base, theirs_path, threshold)
+
+    merged = defaultdict(list)
+    for entry in ours:
+        merged[entry.category]
+    conflicts = []
+
+    def conflict(kind, b, **extra):
+        conflicts.append(dict(kind=kind, category=b.category, index=b.index, q=b.question.get('q'), **extra))
+
+    for o in ours:
+        b = ours_origin.get(id(o))
+        if b is None:
+            merged[o.category].append(o.question)
+            continue
+        t = theirs_by_base[id(b)]
+        if t is None:
+            if not changed_fields(b.question, o.question) and o.category == b.category:
+                continue
+            conflict('modify/delete', b, deleted_in='theirs', kept='ours')
+            merged[o.category].append(o.question)
+            continue
+        category, question, fields = _merge_question(b, o, t)
+        if fields:
+            conflict('modify/modify', b, fields=fields, kept='ours')
+        merged[category].append(question)
+
+    ours_added = {o.chash for o in ours if id(o) not in ours_origin}
+    for t in theirs:
+        b = theirs_origin.get(id(t))
+        if b is None:
+            # Both sides adding the same question yields a single copy
+            if t.chash not in ours_added:
+                merged[t.category].append(t.question)
+        elif ours_by_base[id(b)] is None and (changed_fields(b.question, t.question) or t.category != b.category):
+            conflict('modify/delete', b, deleted_in='ours', kept='theirs')
+            merged[t.category].append(t.question)
+
+    return dict(merged), conflicts
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description='Structural diff and three-way merge for quiz banks')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_diff = sub.add_parser('diff', help='Report added/removed/modified questions per category')
+    p_diff.add_argument('old')
+    p_diff.add_argument('new')
+    p_diff.add_argument('--json', action='store_true', help='Emit the report as JSON')
+    p_diff.add_argument('--threshold', type=float, default=FUZZY_THRESHOLD,
+                        help='Minimum stem similarity for a fuzzy match (default: %(default)s)')
+
+    p_merge = sub.add_parser('merge', help='Three-way merge of concurrent edits')
+    p_merge.add_argument('base')
+    p_merge.add_argument('ours')
+    p_merge.add_argument('theirs')
+    p_merge.add_argument('-o', '--output', help='Write merged bank here (default: stdout)')
+    p_merge.add_argument('--threshold', type=float, default=FUZZY_THRESHOLD)
+
+    args = parser.parse_args()
+
+    if args.command == 'diff':
+        report = diff_banks(args.old, args.new, args.threshold)
+        if args.json:
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            print_diff(report)
+        return
+
+    merged, conflicts = merge_banks(args.base, args.ours, args.theirs, args.threshold)
+    text = json.dumps(merged, indent=2, ensure_ascii=False) + '\n'
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Merged {sum(len(v) for v in merged.values())} questions into {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(text)
+
+    if conflicts:
+        print(f"\n=== {len(conflicts)} CONFLICT(S) ===", file=sys.stderr)
+        for c in conflicts:
+            detail = ', '.join(c['fields']) if c.get('fields') else f"deleted in {c['deleted_in']}"
+            print(f"  ! {c['kind']} {c['category']}[{c['index']}] ({detail}; kept {c['kept']}) {_short(c['q'])}",
+                  file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
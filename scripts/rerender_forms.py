@@ -0,0 +1,673 @@
+#!/usr/bin/env python3
+"""
+KYC PDF re-render scheduler.
+
+A stored KYC PDF is a function of three inputs, each fingerprinted per form:
+  template_hash  sha256 of the template fields this form fills (type, options,
+                 page and position of each widget; absent names included), so a
+                 template revision only touches forms that fill a field it changed
+  mapping_hash   sha256 of the PDF field values the current rules
+                 (kyc_field_mappings.json, kyc_field_index.json, kycFiller.js via
+                 kyc_pdf_data.py) produce for this form's data
+  data_hash      sha256 of forms.data
+The fingerprint of the PDF in storage lives in form_renders
+(migrations/create_form_renders.sql). A form is stale when any hash differs, so
+a one-field mapping fix only re-renders the forms whose field values it changes.
+A revision that only changes static page content (text, logos) changes no
+fingerprint; use run --force to re-render every candidate form then.
+
+Stale forms go through a bounded queue: at most 2 x --workers renders are in
+flight, each rendered (and with --upload, uploaded to generated-pdfs as
+kyc/<client_id>/KYC_<name>_<date>.pdf) on a process pool. Like fillPDF
+(pdfGenerator.js), a render sets text appearances in Helvetica and flattens the
+form, so stored PDFs stay read-only; text placement approximates pdf-lib's.
+Every finished form is appended to a JSONL checkpoint at once; form_renders rows
+and pdf_generated events are written in batches. After a crash, --resume replays the checkpoint
+into the database and skips what is already done (with --upload, only renders
+that were uploaded count as done). The checkpoint is removed after a run with no
+failures.
+
+Templates come from the fetch_templates.py store (run it with --supabase first)
+or --template for all forms, e.g. to stage a new revision.
+
+Subcommands:
+  plan      count candidate forms by stale reason (new, data, template, mapping)
+  run       render the stale set
+  baseline  record fingerprints for never-fingerprinted forms without rendering,
+            adopting the PDFs already in storage (run once, before a rule change)
+
+Usage:
+  python scripts/rerender_forms.py plan [dsn]
+  python scripts/rerender_forms.py baseline [dsn]
+  python scripts/rerender_forms.py run [dsn] --upload [--workers 4] [--resume] [--force]
+Options (all subcommands): --store DIR, --template PDF, --all-versions (every kyc
+form, not just the latest per client)
+"""
+
+import argparse
+import collections
+import datetime
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from urllib.parse import quote
+
+try:
+    import PyPDF2
+except Exception:
+    print('PyPDF2 not installed. Please run: pip install PyPDF2')
+    sys.exit(1)
+
+from diff_templates import inherited_value, widget_field_name
+from fetch_templates import DEFAULT_STORE, TemplateStore
+from kyc_pdf_data import build_pdf_data, expected_field_state, load_rules, source_form_data
+from pg_common import connect, get_dsn
+
+DEFAULT_CHECKPOINT = 'rerender_checkpoint.jsonl'
+DEFAULT_OUT = 'rerendered_pdfs'
+BUCKET = 'generated-pdfs'
+FETCH_BATCH = 200
+RECORD_BATCH = 100
+RETRIES = 3
+BACKOFF_SECONDS = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+FLAG_RADIO = 1 << 15
+FLAG_PUSHBUTTON = 1 << 16
+FLAG_MULTILINE = 1 << 12
+FLAG_HIDDEN = 1 << 1
+REASONS = ('new', 'data', 'template', 'mapping')
+EXTRA_COUNTS = ('forced', 'no_template')
+
+CANDIDATES_SQL = """
+select f.id, f.client_id, f.form_template_id, f.data, r.template_hash, r.mapping_hash, r.data_hash
+from {source} f
+left join form_renders r on r.form_id = f.id
+where f.form_type = 'kyc'
+"""
+
+RECORD_SQL = """
+insert into form_renders (form_id, template_hash, mapping_hash, data_hash, storage_path, rendered_at)
+values (%s, %s, %s, %s, %s, %s)
+on conflict (form_id) do update
+  set template_hash = excluded.template_hash,
+      mapping_hash = excluded.mapping_hash,
+      data_hash = excluded.data_hash,
+      storage_path = excluded.storage_path,
+      rendered_at = excluded.rendered_at
+  where form_renders.rendered_at <= excluded.rendered_at
+"""
+
+# Idempotent so a resumed run can replay checkpoint entries that were already recorded
+EVENT_SQL = """
+insert into form_events (form_id, event_type, payload)
+select %s, 'pdf_generated', %s::jsonb
+where not exists (
+  select 1 from form_events
+  where form_id = %s and event_type = 'pdf_generated'
+    and payload->>'storage_path' = %s and payload->>'generated_at' = %s
+)
+"""
+
+
+def canonical_hash(value):
+    text = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def pdf_data_for(stored, rules):
+    """pdfData fillKYCPDF builds for a stored forms.data payload"""
+    pdf_data, _ = build_pdf_data(source_form_data(stored), stored.get('other_countries') or [],
+                                 stored.get('other_investments') or [], rules)
+    return pdf_data
+
+
+def fingerprint(stored, pdf_data, template_fields):
+    """template_hash covers only the template fields pdf_data writes to (None when missing)"""
+    return {'template_hash': canonical_hash({name: template_fields.get(name) for name in pdf_data}),
+            'mapping_hash': canonical_hash(pdf_data), 'data_hash': canonical_hash(stored)}
+
+
+def stale_reason(current, recorded):
+    """First input that changed since the stored render, or None when it is current"""
+    if recorded['data_hash'] is None:
+        return 'new'
+    # mapping before template: template_hash covers the fields pdf_data writes, so a
+    # mapping fix that retargets a field changes both
+    for key, reason in (('data_hash', 'data'), ('mapping_hash', 'mapping'), ('template_hash', 'template')):
+        if current[key] != recorded[key]:
+            return reason
+    return None
+
+
+def template_fields(template):
+    """{field name: [kind, [[page, rect, on state] per widget]]} from template bytes"""
+    reader = PyPDF2.PdfReader(io.BytesIO(template))
+    fields = {}
+    for page_no, page in enumerate(reader.pages, 1):
+        for annot in page.get('/Annots') or []:
+            annot = annot.get_object()
+            name = widget_field_name(annot) if annot.get('/Subtype') == '/Widget' else None
+            if not name:
+                continue
+            state = on_state(annot)
+            rect = [round(float(v), 1) for v in annot.get('/Rect', [0, 0, 0, 0])]
+            fields.setdefault(name, [field_kind(annot), []])[1].append(
+                [page_no, rect, None if state is None else str(state)])
+    return fields
+
+
+def read_template(path):
+    """(template bytes, template_fields)"""
+    with open(path, 'rb') as f:
+        template = f.read()
+    return template, template_fields(template)
+
+
+def load_templates(cur, store_dir, override=None):
+    """{form_template_id: (pdf path, template_fields)}; key None is the template for forms without one"""
+    if override:
+        return {None: (override, read_template(override)[1])}
+    store = TemplateStore(store_dir)
+    cur.execute("select id, name, pdf_url from form_templates order by name")
+    templates = {}
+    for template_id, name, url in cur.fetchall():
+        path = store.path(store.key_for(url), '.pdf')
+        if not os.path.isfile(path):
+            print(f"  warning: template {name!r} is not in {store_dir}; run fetch_templates.py --supabase")
+            continue
+        templates[template_id] = (path, read_template(path)[1])
+        # KYCForm.jsx uses the first template whose name contains 'kyc'
+        if None not in templates and 'kyc' in name.lower():
+            templates[None] = templates[template_id]
+    return templates
+
+
+def compute_stale(conn, templates, rules, all_versions=False, force=False):
+    """([stale form], Counter of reasons) for every candidate KYC form; force marks fresh ones 'forced'"""
+    counts = collections.Counter()
+    stale = []
+    source = 'forms' if all_versions else 'latest_forms'
+    with conn.transaction(), conn.cursor(name='rerender_candidates') as cur:
+        cur.itersize = 2000
+        cur.execute(CANDIDATES_SQL.format(source=source))
+        for form_id, client_id, template_id, data, template_hash, mapping_hash, data_hash in cur:
+            template = templates.get(template_id) or templates.get(None)
+            if template is None:
+                counts['no_template'] += 1
+                continue
+            data = data or {}
+            current = fingerprint(data, pdf_data_for(data, rules), template[1])
+            reason = stale_reason(current, {'template_hash': template_hash, 'mapping_hash': mapping_hash,
+                                            'data_hash': data_hash}) or ('forced' if force else None)
+            counts[reason or 'fresh'] += 1
+            if reason:
+                stale.append({'form_id': str(form_id), 'client_id': str(client_id), 'template': template[0],
+                              'fingerprint': current, 'reason': reason})
+    return stale, counts
+
+
+def field_kind(widget):
+    field_type = inherited_value(widget, '/FT')
+    flags = int(inherited_value(widget, '/Ff') or 0)
+    if field_type == '/Tx':
+        return 'text'
+    if field_type == '/Btn' and not flags & FLAG_PUSHBUTTON:
+        return 'radio' if flags & FLAG_RADIO else 'checkbox'
+    return 'other'
+
+
+def on_state(widget):
+    """The widget's checked appearance name (e.g. /On), or None"""
+    appearance = widget.get('/AP')
+    normal = appearance.get_object().get('/N') if appearance is not None else None
+    for state in (normal.get_object() if normal is not None else {}):
+        if state != '/Off':
+            return state
+    return None
+
+
+def _pdf_string(text):
+    """Literal string operand for a content stream (WinAnsi, as pdf-lib's Helvetica)"""
+    data = text.encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def text_appearance(writer, widget, text, font, default_da):
+    """Normal appearance stream for a text widget showing `text`, like pdf-lib's setText"""
+    x1, y1, x2, y2 = [float(v) for v in widget['/Rect']]
+    width, height = abs(x2 - x1), abs(y2 - y1)
+    da = str(inherited_value(widget, '/DA') or default_da or '').split()
+    size = float(da[da.index('Tf') - 1]) if 'Tf' in da[1:] else 0.0
+    multiline = int(inherited_value(widget, '/Ff') or 0) & FLAG_MULTILINE
+    lines = text.splitlines() if multiline else [' '.join(text.splitlines())]
+    lines = lines or ['']
+    if not size:
+        # auto size (Tf 0): fit the lines to the box; Helvetica averages ~0.5 em per character
+        longest = max(len(line) for line in lines) or 1
+        size = max(4.0, min((height - 4) / (1.2 * len(lines)), (width - 4) / (0.5 * longest), 12.0))
+    quadding = int(inherited_value(widget, '/Q') or 0)
+    # Background and border from /MK, as pdf-lib draws them
+    ops = []
+    characteristics = widget.get('/MK')
+    characteristics = characteristics.get_object() if characteristics is not None else {}
+    border = widget.get('/BS')
+    border_width = float(border.get_object().get('/W', 1)) if border is not None else 1.0
+    for key, operator in (('/BG', (b'g', b'rg', b'k')), ('/BC', (b'G', b'RG', b'K'))):
+        color = [float(v) for v in characteristics.get(key) or []]
+        if len(color) in (1, 3, 4) and (key == '/BG' or border_width):
+            op = operator[(1, 3, 4).index(len(color))]
+            ops.append(b' '.join(b'%.3f' % v for v in color) + b' ' + op)
+            if key == '/BG':
+                ops.append(b'0 0 %.2f %.2f re f' % (width, height))
+            else:
+                inset = border_width / 2
+                ops.append(b'%.2f w %.2f %.2f %.2f %.2f re S' % (
+                    border_width, inset, inset, width - border_width, height - border_width))
+    ops += [b'/Tx BMC', b'q', b'1 1 %.2f %.2f re W n' % (width - 2, height - 2), b'BT', b'/Helv %.2f Tf' % size, b'0 g']
+    top = height - 2 - size if multiline else (height - size) / 2 + 0.22 * size
+    for n, line in enumerate(lines):
+        estimate = 0.5 * size * len(line)
+        x = 2 if quadding == 0 else (width - estimate) / 2 if quadding == 1 else width - 2 - estimate
+        ops.append(b'1 0 0 1 %.2f %.2f Tm %s Tj' % (x, top - n * 1.2 * size, _pdf_string(line)))
+    ops += [b'ET', b'Q', b'EMC']
+
+    stream = PyPDF2.generic.DecodedStreamObject()
+    stream.set_data(b'\n'.join(ops))
+    stream.update({
+        PyPDF2.generic.NameObject('/Type'): PyPDF2.generic.NameObject('/XObject'),
+        PyPDF2.generic.NameObject('/Subtype'): PyPDF2.generic.NameObject('/Form'),
+        PyPDF2.generic.NameObject('/BBox'): PyPDF2.generic.ArrayObject(
+            [PyPDF2.generic.FloatObject(v) for v in (0, 0, width, height)]),
+        PyPDF2.generic.NameObject('/Resources'): PyPDF2.generic.DictionaryObject({
+            PyPDF2.generic.NameObject('/Font'): PyPDF2.generic.DictionaryObject({
+                PyPDF2.generic.NameObject('/Helv'): font})}),
+    })
+    return writer._add_object(stream)
+
+
+def _appearance(widget):
+    """The appearance stream a viewer shows for the widget now, or None"""
+    appearance = widget.get('/AP')
+    normal = appearance.get_object().get('/N') if appearance is not None else None
+    if normal is None:
+        return None
+    normal = normal.get_object()
+    if isinstance(normal, PyPDF2.generic.StreamObject):
+        return normal
+    state = widget.get('/AS')
+    return normal[state].get_object() if state is not None and state in normal else None
+
+
+def flatten(writer):
+    """Draw every widget's current appearance into its page and drop the form, as pdf-lib's flatten()"""
+    for page in writer.pages:
+        annots = page.get('/Annots')
+        if not annots:
+            continue
+        if '/Resources' not in page:
+            page[PyPDF2.generic.NameObject('/Resources')] = PyPDF2.generic.DictionaryObject()
+        resources = page['/Resources'].get_object()
+        if '/XObject' not in resources:
+            resources[PyPDF2.generic.NameObject('/XObject')] = PyPDF2.generic.DictionaryObject()
+        xobjects = resources['/XObject'].get_object()
+        draws, kept = [], PyPDF2.generic.ArrayObject()
+        for ref in annots:
+            widget = ref.get_object()
+            if widget.get('/Subtype') != '/Widget':
+                kept.append(ref)
+                continue
+            appearance = _appearance(widget)
+            if appearance is None or int(widget.get('/F', 0)) & FLAG_HIDDEN:
+                continue
+            # Map the (Matrix-transformed) BBox onto /Rect, per the spec's form placement algorithm
+            a, b, c, d, e, f = [float(v) for v in appearance.get('/Matrix', [1, 0, 0, 1, 0, 0])]
+            bx1, by1, bx2, by2 = [float(v) for v in appearance.get('/BBox', [0, 0, 1, 1])]
+            corners = [(a * x + c * y + e, b * x + d * y + f) for x in (bx1, bx2) for y in (by1, by2)]
+            xs, ys = [p[0] for p in corners], [p[1] for p in corners]
+            rx1, ry1, rx2, ry2 = [float(v) for v in widget['/Rect']]
+            rx1, rx2, ry1, ry2 = min(rx1, rx2), max(rx1, rx2), min(ry1, ry2), max(ry1, ry2)
+            sx = (rx2 - rx1) / ((max(xs) - min(xs)) or 1)
+            sy = (ry2 - ry1) / ((max(ys) - min(ys)) or 1)
+            name = f"/FlatWidget{len(xobjects)}"
+            xobjects[PyPDF2.generic.NameObject(name)] = writer._add_object(appearance)
+            draws.append(b'q %.4f 0 0 %.4f %.4f %.4f cm %s Do Q' % (
+                sx, sy, rx1 - min(xs) * sx, ry1 - min(ys) * sy, name.encode('ascii')))
+        page[PyPDF2.generic.NameObject('/Annots')] = kept
+        if not kept:
+            del page['/Annots']
+        if draws:
+            # Bracket the original content so its graphics state can't leak into the widgets
+            before, after = PyPDF2.generic.DecodedStreamObject(), PyPDF2.generic.DecodedStreamObject()
+            before.set_data(b'q')
+            after.set_data(b'Q\n' + b'\n'.join(draws))
+            # raw_get keeps the IndirectObject; a content stream must stay indirect
+            contents = page.raw_get('/Contents') if '/Contents' in page else PyPDF2.generic.ArrayObject()
+            parts = list(contents.get_object()) if isinstance(contents.get_object(), list) else [contents]
+            page[PyPDF2.generic.NameObject('/Contents')] = PyPDF2.generic.ArrayObject(
+                [writer._add_object(before)] + parts + [writer._add_object(after)])
+    writer._root_object.pop('/AcroForm', None)
+
+
+def fill_template(template, pdf_data):
+    """
+    Apply pdfData to the template and flatten it, as fillPDF (pdfGenerator.js) does:
+    text fields get a Helvetica appearance, checkboxes and radios their on/off
+    state, then every widget is drawn into the page and the form is removed.
+    Text layout approximates pdf-lib's (no exact glyph metrics).
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(template))
+    writer = PyPDF2.PdfWriter()
+    writer.append(reader)
+    acroform = reader.trailer['/Root'].get('/AcroForm')
+    default_da = acroform.get_object().get('/DA') if acroform is not None else None
+    widgets = collections.defaultdict(list)
+    for page in writer.pages:
+        for annot in page.get('/Annots') or []:
+            annot = annot.get_object()
+            if annot.get('/Subtype') == '/Widget':
+                name = widget_field_name(annot)
+                if name:
+                    widgets[name].append(annot)
+
+    font = writer._add_object(PyPDF2.generic.DictionaryObject({
+        PyPDF2.generic.NameObject('/Type'): PyPDF2.generic.NameObject('/Font'),
+        PyPDF2.generic.NameObject('/Subtype'): PyPDF2.generic.NameObject('/Type1'),
+        PyPDF2.generic.NameObject('/BaseFont'): PyPDF2.generic.NameObject('/Helvetica'),
+        PyPDF2.generic.NameObject('/Encoding'): PyPDF2.generic.NameObject('/WinAnsiEncoding'),
+    }))
+    off = PyPDF2.generic.NameObject('/Off')
+    for name, value in pdf_data.items():
+        if name not in widgets:
+            continue
+        kids = widgets[name]
+        kind = field_kind(kids[0])
+        if kind == 'text':
+            text = expected_field_state('text', value)
+            for widget in kids:
+                widget[PyPDF2.generic.NameObject('/AP')] = PyPDF2.generic.DictionaryObject({
+                    PyPDF2.generic.NameObject('/N'): text_appearance(writer, widget, text, font, default_da)})
+        elif kind == 'checkbox':
+            checked = expected_field_state('checkbox', value)
+            for widget in kids:
+                widget[PyPDF2.generic.NameObject('/AS')] = (on_state(widget) or off) if checked else off
+        elif kind == 'radio':
+            states = {str(s)[1:]: s for s in map(on_state, kids) if s is not None}
+            option = expected_field_state('radio', value, tuple(states))
+            if option is None:
+                continue
+            for widget in kids:
+                widget[PyPDF2.generic.NameObject('/AS')] = states[option] if on_state(widget) == states[option] else off
+    flatten(writer)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def pdf_filename(stored, client_id, day):
+    """kycFiller.js storage file name"""
+    if stored.get('first_name') and stored.get('last_name'):
+        client_name = f"{stored['first_name']}_{stored['last_name']}"
+    else:
+        client_name = f"Client_{client_id}"
+    return f"KYC_{client_name}_{day}.pdf"
+
+
+def upload_pdf(upload, path, pdf):
+    """Upsert one object into the generated-pdfs bucket via the Storage REST API"""
+    url = f"{upload['url'].rstrip('/')}/storage/v1/object/{BUCKET}/{quote(path)}"
+    headers = {'Authorization': f"Bearer {upload['key']}", 'apikey': upload['key'],
+               'Content-Type': 'application/pdf', 'x-upsert': 'true'}
+    last_error = None
+    for attempt in range(RETRIES):
+        if attempt:
+            time.sleep(BACKOFF_SECONDS * (2 ** (attempt - 1)))
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, data=pdf, headers=headers, method='POST'),
+                                        timeout=60):
+                return
+        except urllib.error.HTTPError as e:
+            if e.code not in RETRY_STATUSES:
+                raise RuntimeError(f"upload failed: HTTP {e.code} {e.reason}")
+            last_error = f"HTTP {e.code}"
+        except (urllib.error.URLError, TimeoutError) as e:
+            last_error = f"{type(e).__name__}: {e}"
+    raise RuntimeError(f"upload failed after {RETRIES} attempts: {last_error}")
+
+
+_rules = None
+_upload = None
+_templates = {}
+
+
+def _init_worker(upload):
+    global _rules, _upload
+    _rules = load_rules()
+    _upload = upload
+
+
+def _template(path):
+    if path not in _templates:
+        _templates[path] = read_template(path)
+    return _templates[path]
+
+
+def render_form(task):
+    """Render one form, write it under the output dir and optionally upload it; runs in a worker process"""
+    result = {'form_id': task['form_id'], 'status': 'done'}
+    try:
+        template, fields = _template(task['template'])
+        stored = task['data']
+        pdf_data = pdf_data_for(stored, _rules)
+        # Fingerprint what is actually rendered; the data may have changed since the plan
+        result['fingerprint'] = fingerprint(stored, pdf_data, fields)
+        pdf = fill_template(template, pdf_data)
+        generated_at = datetime.datetime.now(datetime.timezone.utc)
+        filename = pdf_filename(stored, task['client_id'], generated_at.date().isoformat())
+        path = f"kyc/{task['client_id']}/{filename}"
+        local = os.path.join(task['out'], path)
+        os.makedirs(os.path.dirname(local), exist_ok=True)
+        with open(local + '.tmp', 'wb') as f:
+            f.write(pdf)
+        os.replace(local + '.tmp', local)
+        if _upload:
+            upload_pdf(_upload, path, pdf)
+            result['storage_path'] = path
+        result.update(filename=filename, pdf_size=len(pdf), generated_at=generated_at.isoformat(),
+                      reason=task['reason'])
+    except Exception as e:
+        result.update(status='failed', error=f"{type(e).__name__}: {e}")
+    return result
+
+
+def read_checkpoint(path):
+    """{form_id: last checkpoint entry}; a torn last line from a crash is ignored"""
+    entries = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry['form_id']] = entry
+    return entries
+
+
+def record_renders(conn, results):
+    """Write fingerprints and pdf_generated events for uploaded renders in one transaction"""
+    results = [r for r in results if r.get('storage_path')]
+    if not results:
+        return
+    with conn.transaction(), conn.cursor() as cur:
+        cur.executemany(RECORD_SQL, [
+            (r['form_id'], r['fingerprint']['template_hash'], r['fingerprint']['mapping_hash'],
+             r['fingerprint']['data_hash'], r['storage_path'], r['generated_at']) for r in results])
+        cur.executemany(EVENT_SQL, [
+            (r['form_id'], json.dumps({'storage_path': r['storage_path'], 'filename': r['filename'],
+                                       'pdf_size': r['pdf_size'], 'generated_at': r['generated_at'],
+                                       'rerender_reason': r['reason']}),
+             r['form_id'], r['storage_path'], r['generated_at']) for r in results])
+
+
+def fetch_data(conn, form_ids):
+    with conn.cursor() as cur:
+        cur.execute("select id, data from forms where id = any(%s::uuid[])", (form_ids,))
+        return {str(form_id): data or {} for form_id, data in cur.fetchall()}
+
+
+def print_counts(title, counts):
+    print(f"=== {title} ({sum(counts.values())} forms) ===")
+    for key in ('fresh',) + REASONS:
+        print(f"  {key:<12} {counts.get(key, 0)}")
+    for key in EXTRA_COUNTS:
+        if counts.get(key):
+            print(f"  {key:<12} {counts[key]}")
+
+
+def cmd_plan(conn, templates, rules, args):
+    stale, counts = compute_stale(conn, templates, rules, args.all_versions)
+    print_counts('RE-RENDER PLAN', counts)
+    if stale:
+        print()
+        print("=== STALE FORMS (first 20) ===")
+        for item in stale[:20]:
+            print(f"  {item['form_id']}  client {item['client_id']}  [{item['reason']}]")
+
+
+def cmd_baseline(conn, templates, rules, args):
+    stale, counts = compute_stale(conn, templates, rules, args.all_versions)
+    new = [item for item in stale if item['reason'] == 'new']
+    with conn.transaction(), conn.cursor() as cur:
+        cur.executemany(
+            "insert into form_renders (form_id, template_hash, mapping_hash, data_hash) "
+            "values (%s, %s, %s, %s) on conflict (form_id) do nothing",
+            [(item['form_id'], item['fingerprint']['template_hash'], item['fingerprint']['mapping_hash'],
+              item['fingerprint']['data_hash']) for item in new])
+    print_counts('BASELINE', counts)
+    print(f"\nRecorded fingerprints for {len(new)} forms; {len(stale) - len(new)} stale forms left for 'run'")
+
+
+def cmd_run(conn, templates, rules, args):
+    upload = None
+    if args.upload:
+        url = os.environ.get('SUPABASE_URL') or os.environ.get('VITE_SUPABASE_URL')
+        key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+        if not url or not key:
+            print('Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY to upload')
+            sys.exit(1)
+        upload = {'url': url, 'key': key}
+
+    done = {}
+    if os.path.exists(args.checkpoint):
+        if not args.resume:
+            print(f"{args.checkpoint} exists; pass --resume to continue that run or remove it")
+            sys.exit(1)
+        entries = read_checkpoint(args.checkpoint).values()
+        record_renders(conn, [entry for entry in entries if entry['status'] == 'done'])
+        # a local-only render is not done for an uploading run
+        done = {entry['form_id']: entry for entry in entries
+                if entry['status'] == 'done' and (entry.get('storage_path') or not upload)}
+
+    stale, counts = compute_stale(conn, templates, rules, args.all_versions, args.force)
+    todo = [item for item in stale
+            if done.get(item['form_id'], {}).get('fingerprint') != item['fingerprint']]
+    print_counts('RE-RENDER PLAN', counts)
+    if len(todo) < len(stale):
+        print(f"  {'resumed':<12} {len(stale) - len(todo)} already done in {args.checkpoint}")
+    print()
+
+    statuses = collections.Counter()
+    failures = []
+    pending = []
+    started = time.monotonic()
+    checkpoint = open(args.checkpoint, 'a', encoding='utf-8')
+
+    def finish(result):
+        checkpoint.write(json.dumps(result) + '\n')
+        checkpoint.flush()
+        statuses[result['status']] += 1
+        if result['status'] == 'failed':
+            failures.append(result)
+        pending.append(result)
+        if len(pending) >= RECORD_BATCH:
+            record_renders(conn, pending)
+            pending.clear()
+        total = sum(statuses.values())
+        if total % 500 == 0:
+            print(f"  {total}/{len(todo)} rendered ({total / (time.monotonic() - started):.1f}/s)")
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(upload,)) as pool:
+            in_flight = set()
+            for start in range(0, len(todo), FETCH_BATCH):
+                batch = todo[start:start + FETCH_BATCH]
+                data = fetch_data(conn, [item['form_id'] for item in batch])
+                for item in batch:
+                    if item['form_id'] not in data:
+                        statuses['deleted'] += 1
+                        continue
+                    while len(in_flight) >= 2 * args.workers:
+                        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            finish(future.result())
+                    in_flight.add(pool.submit(render_form, {
+                        'form_id': item['form_id'], 'client_id': item['client_id'], 'template': item['template'],
+                        'data': data[item['form_id']], 'reason': item['reason'], 'out': args.out}))
+            for future in wait(in_flight).done:
+                finish(future.result())
+        record_renders(conn, pending)
+    finally:
+        checkpoint.close()
+
+    elapsed = time.monotonic() - started
+    print(f"=== RE-RENDER ({sum(statuses.values())} forms, {elapsed:.1f}s) ===")
+    for status in ('done', 'failed', 'deleted'):
+        print(f"  {status:<12} {statuses.get(status, 0)}")
+    for failure in failures[:20]:
+        print(f"  failed {failure['form_id']}: {failure['error']}")
+    print(f"PDFs: {os.path.abspath(args.out)}")
+    if not upload:
+        print("Not uploaded (no --upload); form_renders is unchanged")
+    if failures:
+        print(f"Checkpoint kept: {args.checkpoint} (re-run with --resume to retry the failures)")
+        sys.exit(1)
+    os.remove(args.checkpoint)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-render only the stored KYC PDFs whose inputs changed')
+    sub = parser.add_subparsers(dest='command', required=True)
+    commands = {}
+    for name, func, help_text in (('plan', cmd_plan, 'Count stale forms by reason'),
+                                  ('baseline', cmd_baseline, 'Fingerprint never-fingerprinted forms as current'),
+                                  ('run', cmd_run, 'Render the stale forms')):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument('dsn', nargs='?')
+        command.add_argument('--store', default=DEFAULT_STORE, help='fetch_templates.py store')
+        command.add_argument('--template', help='Render every form with this template PDF')
+        command.add_argument('--all-versions', action='store_true', help='Every kyc form, not only the latest')
+        commands[name] = (command, func)
+    run = commands['run'][0]
+    run.add_argument('--workers', type=int, default=os.cpu_count())
+    run.add_argument('--out', default=DEFAULT_OUT, help='Local copy of each rendered PDF')
+    run.add_argument('--upload', action='store_true', help='Upload to generated-pdfs and record fingerprints')
+    run.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT)
+    run.add_argument('--resume', action='store_true')
+    run.add_argument('--force', action='store_true',
+                     help='Also re-render forms whose fingerprint is current (static template changes)')
+    args = parser.parse_args()
+
+    rules = load_rules()
+    with connect(get_dsn(args.dsn), autocommit=True) as conn:
+        with conn.cursor() as cur:
+            templates = load_templates(cur, args.store, args.template)
+        commands[args.command][1](conn, templates, rules, args)
+
+
+if __name__ == "__main__":
+    main()
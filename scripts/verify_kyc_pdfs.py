@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+KYC PDF round-trip verifier.
+
+fillPDF (src/utils/pdfGenerator.js) skips any field it cannot set, so a renamed
+template field silently produces a blank PDF field. This re-applies the
+kyc_field_mappings.json rules to each PDF's source record (kyc_pdf_data.py, a
+port of kycFiller.js), reads the AcroForm values back out of the generated PDF
+and reports every field that does not hold what fillPDF was asked to put there.
+Checks run on a process pool, so large overnight audits scale with cores.
+
+Mismatch kinds:
+  missing_field   a mapped PDF field name does not exist in the PDF
+  value           the field exists but holds something else
+  invalid_option  a radio group has no option matching the value
+  not_fillable    the field is a kind fillPDF never sets (choice, signature, push button)
+  text_not_found  flattened PDF: an expected text value is not on any page
+
+Flattened PDFs have no AcroForm left; for those only text values can be
+checked, against the page text.
+
+Records are JSONL, one per PDF:
+  {"pdf": "kyc/<client_id>/KYC_Jane_Doe.pdf", "data": {...forms.data...}}
+  optional: "other_countries", "other_investments" (default: from data),
+            "raw": true when data is exactly what fillKYCPDF received
+"pdf" is resolved under <pdf_dir>, falling back to its file name. Export from Supabase with:
+  select jsonb_build_object('pdf', e.payload->>'storage_path', 'form_id', f.id, 'data', f.data)
+  from form_events e join forms f on f.id = e.form_id where e.event_type = 'pdf_generated';
+
+Usage:
+  python scripts/verify_kyc_pdfs.py <pdf_dir> <records.jsonl> [--workers 8] [--report mismatches.jsonl]
+"""
+
+import argparse
+import collections
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import PyPDF2
+except Exception:
+    print('PyPDF2 not installed. Please run: pip install PyPDF2')
+    sys.exit(1)
+
+from kyc_pdf_data import build_pdf_data, expected_field_state, js_string, js_truthy, load_rules, source_form_data
+
+FLAG_PUSHBUTTON = 1 << 16
+FLAG_RADIO = 1 << 15
+SPACE_RE = re.compile(r'\s+')
+
+_rules = None
+
+
+def _init_worker():
+    global _rules
+    _rules = load_rules()
+
+
+def read_form_fields(reader):
+    """{name: (kind, value, options)} for the terminal AcroForm fields"""
+    fields = {}
+    for name, field in (reader.get_fields() or {}).items():
+        field_type = field.get('/FT')
+        flags = int(field.get('/Ff', 0) or 0)
+        value = field.get('/V')
+        options = ()
+        if field_type == '/Tx':
+            kind, value = 'text', '' if value is None else str(value)
+        elif field_type == '/Btn' and flags & FLAG_PUSHBUTTON:
+            kind = 'other'
+        elif field_type == '/Btn' and flags & FLAG_RADIO:
+            kind = 'radio'
+            options = tuple(str(s)[1:] for s in field.get('/_States_', []) if str(s) != '/Off')
+            value = str(value)[1:] if value is not None and str(value) != '/Off' else None
+        elif field_type == '/Btn':
+            kind, value = 'checkbox', value is not None and str(value) != '/Off'
+        elif field_type is None:
+            continue
+        else:
+            kind = 'other'
+        fields[name] = (kind, value, options)
+    return fields
+
+
+def check_fields(fields, expected, sources):
+    mismatches = []
+    checked = 0
+    for pdf_field, value in expected.items():
+        source = sources[pdf_field]
+        if pdf_field not in fields:
+            # unmapped form keys are passed through too; only mapped names must exist
+            if source is not None:
+                mismatches.append({'field': pdf_field, 'logical': source, 'kind': 'missing_field',
+                                   'expected': value})
+            continue
+        kind, actual, options = fields[pdf_field]
+        if kind == 'other':
+            if source is not None and js_truthy(value):
+                mismatches.append({'field': pdf_field, 'logical': source, 'kind': 'not_fillable',
+                                   'expected': value})
+            continue
+        want = expected_field_state(kind, value, options)
+        if kind == 'radio' and want is None:
+            if js_truthy(value):
+                mismatches.append({'field': pdf_field, 'logical': source, 'kind': 'invalid_option',
+                                   'expected': js_string(value), 'actual': actual, 'options': list(options)})
+            continue
+        checked += 1
+        if actual != want:
+            mismatches.append({'field': pdf_field, 'logical': source, 'kind': 'value',
+                               'expected': want, 'actual': actual})
+    return checked, mismatches
+
+
+def check_page_text(reader, expected, sources, field_types):
+    """Flattened PDF: look for each mapped text value in the page text"""
+    text = SPACE_RE.sub(' ', ' '.join(page.extract_text() or '' for page in reader.pages))
+    mismatches = []
+    checked = 0
+    for pdf_field, value in expected.items():
+        if sources[pdf_field] is None or field_types.get(pdf_field) == 'Btn':
+            continue
+        want = SPACE_RE.sub(' ', expected_field_state('text', value)).strip()
+        if not want:
+            continue
+        checked += 1
+        if want not in text:
+            mismatches.append({'field': pdf_field, 'logical': sources[pdf_field], 'kind': 'text_not_found',
+                               'expected': want})
+    return checked, mismatches
+
+
+def verify_record(task):
+    """Verify one generated PDF against its record; runs in a worker process"""
+    line, record, pdf_path = task
+    result = {'line': line, 'pdf': record.get('pdf'), 'status': 'ok', 'checked': 0, 'mismatches': []}
+    if pdf_path is None:
+        result['status'] = 'missing_pdf'
+        return result
+    try:
+        reader = PyPDF2.PdfReader(pdf_path)
+        fields = read_form_fields(reader)
+    except Exception as e:
+        result.update(status='unreadable', error=str(e))
+        return result
+
+    stored = record.get('data') or {}
+    data = stored if record.get('raw') else source_form_data(stored)
+    other_countries = record.get('other_countries', stored.get('other_countries')) or []
+    other_investments = record.get('other_investments', stored.get('other_investments')) or []
+    expected, sources = build_pdf_data(data, other_countries, other_investments, _rules)
+
+    if fields:
+        checked, mismatches = check_fields(fields, expected, sources)
+    else:
+        result['status'] = 'flattened'
+        checked, mismatches = check_page_text(reader, expected, sources, _rules[1])
+    result['checked'] = checked
+    result['mismatches'] = mismatches
+    if mismatches and result['status'] == 'ok':
+        result['status'] = 'mismatch'
+    return result
+
+
+def iter_tasks(pdf_dir, records_path):
+    with open(records_path, 'r', encoding='utf-8') as f:
+        for line, text in enumerate(f, 1):
+            if not text.strip():
+                continue
+            record = json.loads(text)
+            name = record.get('pdf') or ''
+            path = None
+            for candidate in (os.path.join(pdf_dir, name), os.path.join(pdf_dir, os.path.basename(name))):
+                if name and os.path.isfile(candidate):
+                    path = candidate
+                    break
+            yield line, record, path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify generated KYC PDFs against their source records')
+    parser.add_argument('pdf_dir')
+    parser.add_argument('records', help='JSONL: {"pdf": ..., "data": {...}} per line')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--report', help='Write every non-ok result here as JSONL')
+    args = parser.parse_args()
+
+    statuses = collections.Counter()
+    kinds = collections.Counter()
+    by_field = collections.Counter()
+    checked = 0
+    report = open(args.report, 'w', encoding='utf-8') if args.report else None
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+            for result in pool.map(verify_record, iter_tasks(args.pdf_dir, args.records), chunksize=16):
+                statuses[result['status']] += 1
+                checked += result['checked']
+                for mismatch in result['mismatches']:
+                    kinds[mismatch['kind']] += 1
+                    by_field[(mismatch['field'], mismatch['logical'], mismatch['kind'])] += 1
+                if report and result['status'] != 'ok':
+                    report.write(json.dumps(result, default=str) + '\n')
+    finally:
+        if report:
+            report.close()
+
+    print(f"=== KYC PDF VERIFICATION ({sum(statuses.values())} PDFs, {checked} fields checked) ===")
+    for status in ('ok', 'mismatch', 'flattened', 'missing_pdf', 'unreadable'):
+        print(f"  {status:<12} {statuses.get(status, 0)}")
+    print()
+    print("=== MISMATCHES BY KIND ===")
+    if not kinds:
+        print("  none")
+    for kind, count in kinds.most_common():
+        print(f"  {kind:<15} {count}")
+    if by_field:
+        print()
+        print("=== FIELDS WITH MISMATCHES ===")
+        for (field, logical, kind), count in by_field.most_common(40):
+            print(f"  {count:>7}  {field!r} <- {logical or '(form key)'} [{kind}]")
+    if args.report:
+        print(f"\nReport: {args.report}")
+    if kinds or statuses.get('missing_pdf') or statuses.get('unreadable'):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
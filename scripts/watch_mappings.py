@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Watch mode for the mapping tools.
+
+Keeps KYCForm.jsx registrations, kyc_field_mappings.json and
+kyc_pdf_fields.json parsed in memory and, on each save, recomputes only what
+the edit touched:
+  - a changed line in KYCForm.jsx re-regexes that line only; new register()
+    fields get a suggested mapping (generate_full_mapping.map_logical_field)
+  - a changed mapping entry only adjusts the PDF coverage counts for that entry
+  - a changed PDF field list re-suggests every field (all suggestions depend on it)
+
+Usage:
+  python scripts/watch_mappings.py [--out generated_mapping.json] [--interval 0.2] [--once]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from generate_full_mapping import REGISTER_RE, manual, map_logical_field
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+KYC_FORM = os.path.join(ROOT, 'src', 'components', 'KYCForm.jsx')
+KYC_MAPPINGS = os.path.join(ROOT, 'src', 'data', 'kyc_field_mappings.json')
+PDF_FIELDS = os.path.join(ROOT, 'src', 'data', 'kyc_pdf_fields.json')
+
+
+def pdf_refs(mapping):
+    """PDF fields a mapping entry counts as covering (same rule as analyze_mappings.py)"""
+    if not isinstance(mapping, dict):
+        return frozenset()
+    if 'pdf_field' in mapping:
+        return frozenset([mapping['pdf_field']])
+    if 'value_map' in mapping:
+        return frozenset(mapping['value_map'].values())
+    return frozenset()
+
+
+class MappingState:
+    """Parsed inputs plus derived results, updated per edit"""
+
+    def __init__(self):
+        self.line_registers = {}   # source line -> register() names on it
+        self.logical_fields = []
+        self.pdf_names = []
+        self.pdf_map = {}
+        self.mappings = {}
+        self.refs = {}             # logical field -> PDF fields it covers
+        self.ref_count = Counter()  # PDF field -> number of mappings covering it
+        self.suggested = {}        # logical field -> generated mapping entry
+
+    # -- inputs ---------------------------------------------------------------
+
+    def update_form(self, text):
+        """Re-read KYCForm.jsx; only lines not seen before are regexed"""
+        cache = self.line_registers
+        fields = []
+        seen_lines = set()
+        for line in text.splitlines():
+            seen_lines.add(line)
+            regs = cache.get(line)
+            if regs is None:
+                regs = tuple(a or b for a, b in REGISTER_RE.findall(line)) if 'register' in line else ()
+                cache[line] = regs
+            fields.extend(regs)
+        # Forget lines that no longer exist so the cache tracks the file
+        for line in [l for l in cache if l not in seen_lines]:
+            del cache[line]
+
+        fields = list(dict.fromkeys(fields))
+        added = [f for f in fields if f not in self.suggested]
+        removed = [f for f in self.logical_fields if f not in set(fields)]
+        self.logical_fields = fields
+        for f in removed:
+            self.suggested.pop(f, None)
+        for f in added:
+            self.suggested[f] = map_logical_field(f, self.pdf_names, self.pdf_map)
+        return {'registered': added, 'unregistered': removed}
+
+    def update_pdf_fields(self, pdf_fields):
+        names = [f['name'] for f in pdf_fields]
+        if names == self.pdf_names and {f['name']: f['type'] for f in pdf_fields} == self.pdf_map:
+            return {}
+        old = set(self.pdf_names)
+        self.pdf_names = names
+        self.pdf_map = {f['name']: f['type'] for f in pdf_fields}
+        # Every suggestion scores against the full PDF field list
+        changed = []
+        for f in self.logical_fields:
+            entry = map_logical_field(f, self.pdf_names, self.pdf_map)
+            if entry != self.suggested.get(f):
+                changed.append(f)
+            self.suggested[f] = entry
+        return {'pdf_added': sorted(set(names) - old), 'pdf_removed': sorted(old - set(names)),
+                'resuggested': changed}
+
+    def update_mappings(self, mappings):
+        changed = [k for k in set(self.mappings) | set(mappings) if self.mappings.get(k) != mappings.get(k)]
+        for k in changed:
+            old = self.refs.pop(k, frozenset())
+            new = pdf_refs(mappings.get(k))
+            self.ref_count.subtract(old)
+            self.ref_count.update(new)
+            if new:
+                self.refs[k] = new
+        self.ref_count += Counter()  # drop zero counts
+        self.mappings = mappings
+        return {'mapping_changed': sorted(changed)}
+
+    # -- derived --------------------------------------------------------------
+
+    def coverage(self):
+        pdf = set(self.pdf_names)
+        mapped = set(self.ref_count)
+        return {
+            'total_pdf_fields': len(pdf),
+            'mapped_fields': len(mapped),
+            'mapping_coverage': len(mapped) / len(pdf) * 100 if pdf else 0.0,
+            'unmapped_fields': len(pdf - mapped),
+            'invalid_mappings': sorted(mapped - pdf),
+            'registered_without_mapping': [f for f in self.logical_fields if f not in self.mappings],
+        }
+
+    def generated_mapping(self):
+        mapping = {f: self.suggested[f] for f in self.logical_fields}
+        for k, v in manual.items():
+            mapping[k] = v
+        return mapping
+
+
+def _read_text(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def _read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def print_update(state, changes, elapsed_ms, label):
+    cov = state.coverage()
+    print(f"[{time.strftime('%H:%M:%S')}] {label} ({elapsed_ms:.1f} ms)")
+    for key, values in changes.items():
+        if values:
+            print(f"  {key}: {', '.join(values[:10])}{' ...' if len(values) > 10 else ''}")
+    print(f"  coverage: {cov['mapped_fields']}/{cov['total_pdf_fields']} PDF fields "
+          f"({cov['mapping_coverage']:.1f}%), {cov['unmapped_fields']} unmapped")
+    if cov['invalid_mappings']:
+        print(f"  invalid mappings: {', '.join(cov['invalid_mappings'])}")
+    if cov['registered_without_mapping']:
+        print(f"  registered without mapping: {', '.join(cov['registered_without_mapping'])}")
+    sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally recompute mapping coverage on save')
+    parser.add_argument('--out', help='Keep the generated mapping (generate_full_mapping.py output) in this file')
+    parser.add_argument('--interval', type=float, default=0.2, help='Polling interval in seconds')
+    parser.add_argument('--once', action='store_true', help='Compute once and exit')
+    args = parser.parse_args()
+
+    state = MappingState()
+    loaders = [
+        (PDF_FIELDS, lambda p: state.update_pdf_fields(_read_json(p))),
+        (KYC_FORM, lambda p: state.update_form(_read_text(p))),
+        (KYC_MAPPINGS, lambda p: state.update_mappings(_read_json(p))),
+    ]
+    mtimes = {}
+    last_written = None
+
+    while True:
+        for path, load in loaders:
+            mtime = _mtime(path)
+            if mtime is None or mtime == mtimes.get(path):
+                continue
+            started = time.perf_counter()
+            try:
+                changes = load(path)
+            except (OSError, ValueError) as e:
+                # Usually a half-written save; the next poll picks up the final version
+                print(f"[{time.strftime('%H:%M:%S')}] skipped {os.path.basename(path)}: {e}")
+                continue
+            mtimes[path] = mtime
+            if args.out:
+                text = json.dumps(state.generated_mapping(), indent=2, ensure_ascii=False) + '\n'
+                if text != last_written:
+                    with open(args.out, 'w') as f:
+                        f.write(text)
+                    last_written = text
+            print_update(state, changes, (time.perf_counter() - started) * 1000, os.path.basename(path))
+        if args.once:
+            return
+        try:
+            time.sleep(args.interval)
+        except KeyboardInterrupt:
+            return
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
-import { useState, useEffect, useCallback, useMemo } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { useSupabaseClient, useSession } from '../AuthContext';
 import { useNavigate, Navigate } from 'react-router-dom';
 import { useForm } from 'react-hook-form';
+import { searchClients } from '../utils/clientQueries';
 import {
   Search,
   Plus,
@@ -20,10 +21,15 @@ export default function ClientsTable() {
   const navigate = useNavigate();
   const [clients, setClients] = useState([]);
   const [searchQuery, setSearchQuery] = useState('');
+  const [debouncedQuery, setDebouncedQuery] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [showModal, setShowModal] = useState(false);
   const [editingClient, setEditingClient] = useState(null);
   const [error, setError] = useState(null);
+  // Bumped by every first-page fetch; responses from an older request are dropped
+  const requestId = useRef(0);
 
   const {
     register,
@@ -45,20 +51,53 @@ export default function ClientsTable() {
     }
   }, [watch('fixed_assets'), watch('liquid_assets'), watch('liabilities'), setValue]);
 
+  // Search runs server-side; wait for typing to pause before querying
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedQuery(searchQuery), 250);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  // Fetch the first page of matching clients (search + keyset pagination in Postgres)
   const fetchClients = useCallback(async () => {
+    const request = ++requestId.current;
     setLoading(true);
-    const { data, error: fetchError } = await supabase
-      .from('clients')
-      .select('*')
-      .order('created_at', { ascending: false });
-
-    if (fetchError) {
-      setError(fetchError.message);
-    } else {
-      setClients(data || []);
+    // The old cursor belongs to the previous result list; no "Load more" until this page lands
+    setNextCursor(null);
+    try {
+      const { rows, nextCursor: cursor } = await searchClients(supabase, { query: debouncedQuery });
+      if (request !== requestId.current) return;
+      setClients(rows);
+      setNextCursor(cursor);
+      setError(null);
+    } catch (fetchError) {
+      if (request !== requestId.current) return;
+      setError(fetchError.message || String(fetchError));
     }
     setLoading(false);
-  }, [supabase]);
+  }, [supabase, debouncedQuery]);
+
+  const fetchMoreClients = async () => {
+    if (!nextCursor) return;
+    // A new search while this page loads makes it belong to the old result list
+    const request = requestId.current;
+    setLoadingMore(true);
+    try {
+      const { rows, nextCursor: cursor } = await searchClients(supabase, {
+        query: debouncedQuery,
+        cursor: nextCursor,
+      });
+      if (request === requestId.current) {
+        setClients((prev) => prev.concat(rows));
+        setNextCursor(cursor);
+        setError(null);
+      }
+    } catch (fetchError) {
+      if (request === requestId.current) {
+        setError(fetchError.message || String(fetchError));
+      }
+    }
+    setLoadingMore(false);
+  };
 
   useEffect(() => {
     if (session) {
@@ -67,20 +106,6 @@ export default function ClientsTable() {
     }
   }, [session, fetchClients]);
 
-  // Use useMemo for filtered clients instead of useEffect + state
-  const filteredClients = useMemo(() => {
-    if (searchQuery.trim() === '') {
-      return clients;
-    }
-    const query = searchQuery.toLowerCase();
-    return clients.filter(
-      (client) =>
-        client.email?.toLowerCase().includes(query) ||
-        client.first_name?.toLowerCase().includes(query) ||
-        client.last_name?.toLowerCase().includes(query)
-    );
-  }, [searchQuery, clients]);
-
   // Redirect if not logged in (must be after all hooks)
   if (!session) {
     return <Navigate to="/agent/login" replace />;
@@ -219,7 +244,7 @@ export default function ClientsTable() {
                 Loading clients...
               </p>
             </div>
-          ) : filteredClients.length === 0 ? (
+          ) : clients.length === 0 ? (
             <div className="p-8 text-center">
               <Users className="w-12 h-12 text-gray-400 mx-auto mb-4" />
               <p className="text-gray-600 dark:text-gray-300">
@@ -251,7 +276,7 @@ export default function ClientsTable() {
                   </tr>
                 </thead>
                 <tbody className="divide-y divide-gray-200 dark:divide-gray-700">
-                  {filteredClients.map((client) => (
+                  {clients.map((client) => (
                     <tr
                       key={client.id}
                       onClick={() => navigate(`/agent/forms/${client.id}`)}
@@ -315,6 +340,17 @@ export default function ClientsTable() {
                   ))}
                 </tbody>
               </table>
+              {nextCursor && (
+                <div className="p-4 text-center border-t border-gray-200 dark:border-gray-700">
+                  <button
+                    onClick={fetchMoreClients}
+                    disabled={loadingMore}
+                    className="px-4 py-2 text-sm font-medium text-primary-600 dark:text-primary-400 hover:bg-gray-100 dark:hover:bg-gray-700 rounded-lg transition-colors duration-150 disabled:opacity-50"
+                  >
+                    {loadingMore ? 'Loading...' : 'Load more'}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
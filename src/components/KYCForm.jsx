@@ -61,8 +61,8 @@ import { fillKYCPDF } from '../utils/kycFiller';
  * When the form loads, it follows a two-tier prefill approach:
  * 
  * TIER 1 (Preferred): Latest Form Submission
- *   1. Query forms table WHERE form_type='kyc' AND client_id=<id>
- *   2. Order by created_at DESC, take most recent
+ *   1. Query latest_forms view WHERE form_type='kyc' AND client_id=<id>
+ *   2. The view follows the forms_latest pointer to the most recent row (PK lookup)
  *   3. If found, extract complete data payload from submission
  *   4. Populate ALL form fields from this saved state
  *   5. Restore dynamic arrays (otherCountries, otherInvestments, etc.)
@@ -304,7 +304,7 @@ export default function KYCForm() {
    * Prefill Strategy (Two-tier approach):
    * 
    * TIER 1 (Preferred): Load from latest form submission
-     *   - Query forms (form_type='kyc') for most recent submission for this client
+     *   - Query latest_forms (form_type='kyc') for most recent submission for this client
      *   - If found, use complete data payload from that submission
    *   - This ensures users see their previous answers exactly as submitted
    * 
@@ -327,13 +327,12 @@ export default function KYCForm() {
     (async () => {
       try {
         // First, try to get the latest form submission for this client and form type
+        // (latest_forms is a primary-key lookup via forms_latest; see migrations/create_forms_latest.sql)
         const { data: latestSubmission, error: submissionError } = await supabase
-          .from('forms')
+          .from('latest_forms')
           .select('data')
           .eq('client_id', id)
           .eq('form_type', 'kyc')
-          .order('created_at', { ascending: false })
-          .limit(1)
           .single();
 
         // If we have a previous submission, use that data for prefill
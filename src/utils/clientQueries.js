@@ -0,0 +1,35 @@
+import logger from './logger';
+
+export const CLIENTS_PAGE_SIZE = 50;
+
+/**
+ * Fetches one page of the clients listing via the search_clients RPC
+ * (see migrations/add_clients_search.sql). Search and pagination run in
+ * Postgres, and only the columns the table shows are returned.
+ * @param {Object} supabase - Supabase client
+ * @param {Object} params
+ * @param {string} [params.query] - Free-text name/email search (word prefixes)
+ * @param {{created_at: string, id: string}|null} [params.cursor] - Last row of the previous page
+ * @param {number} [params.limit] - Page size
+ * @returns {Promise<{rows: Object[], nextCursor: {created_at: string, id: string}|null}>}
+ */
+export async function searchClients(supabase, { query = '', cursor = null, limit = CLIENTS_PAGE_SIZE } = {}) {
+  const { data, error } = await supabase.rpc('search_clients', {
+    p_query: query.trim() || null,
+    p_after_created_at: cursor ? cursor.created_at : null,
+    p_after_id: cursor ? cursor.id : null,
+    p_limit: limit,
+  });
+
+  if (error) {
+    logger.error('Failed to search clients', { error, query });
+    throw error;
+  }
+
+  const rows = data || [];
+  const last = rows[rows.length - 1];
+  return {
+    rows,
+    nextCursor: rows.length === limit && last ? { created_at: last.created_at, id: last.id } : null,
+  };
+}
@@ -1,7 +1,11 @@
 import { fillPDF } from './pdfGenerator';
 import logger from './logger';
 import kycFieldMappings from '../data/kyc_field_mappings.json';
-import pdfFields from '../data/kyc_pdf_fields.json';
+import fieldIndex from '../data/kyc_field_index.json';
+
+// Precompiled by scripts/build_field_index.py; avoids scanning kyc_pdf_fields.json per fill.
+// fillPlan is kycFieldMappings with every value_map target's Btn type already resolved.
+const { fill_plan: fillPlan, pdf_field_types: pdfFieldTypes, fallback_fields: fallbackFields } = fieldIndex;
 
 /**
  * Fills a KYC PDF with form data, handling complex field mappings and button logic
@@ -49,13 +53,11 @@ export async function fillKYCPDF(formData, otherCountries = [], otherInvestments
     annual_income: bucketAnnualIncome(formData?.annual_income)
   };
 
-  // Build pdfData mapping form data to PDF field names using kycFieldMappings
+  // Build pdfData mapping form data to PDF field names using the compiled fill plan
   const pdfData = {};
 
   // Map logical fields to PDF fields with KYC-specific logic
-  Object.entries(kycFieldMappings).forEach(([logicalField, mapping]) => {
-    if (!mapping || typeof mapping !== 'object' || !mapping.pdf_field) return;
-
+  Object.entries(fillPlan).forEach(([logicalField, mapping]) => {
     const pdfName = mapping.pdf_field;
     const val = normalizedFormData[logicalField];
 
@@ -66,10 +68,11 @@ export async function fillKYCPDF(formData, otherCountries = [], otherInvestments
       pdfData[pdfName] = val ? (mapping.checked_value || 'On') : (mapping.unchecked_value || 'Off');
     } else if (mapping.type === 'radio_group' && mapping.value_map) {
       // Handle radio groups with value mapping
-      const mapped = mapping.value_map[String(val)] || String(val);
+      const target = mapping.value_map[String(val)];
+      const mapped = target ? target.pdf_field : String(val);
 
       // If mapped value matches a Btn PDF field, set that Btn to On
-      const isBtn = pdfFields.find((f) => f.name === mapped && f.type === 'Btn');
+      const isBtn = target ? target.is_btn : pdfFieldTypes[mapped] === 'Btn';
       if (isBtn) {
         pdfData[mapped] = mapping.checked_value || 'On';
       } else {
@@ -113,7 +116,10 @@ export async function fillKYCPDF(formData, otherCountries = [], otherInvestments
     if (m && m.value_map) {
       const mapped = m.value_map[String(normalizedFormData.annual_income)] || String(normalizedFormData.annual_income);
       pdfData[mapped] = m.checked_value || 'On';
-      pdfData[m.pdf_field] = mapped;
+      // pdf_field is itself a bucket checkbox; writing the label there would uncheck it
+      if (pdfFieldTypes[m.pdf_field] !== 'Btn') {
+        pdfData[m.pdf_field] = mapped;
+      }
     }
   }
 
@@ -123,7 +129,10 @@ export async function fillKYCPDF(formData, otherCountries = [], otherInvestments
     if (m && m.value_map) {
       const mapped = m.value_map[String(normalizedFormData.joint_annual_income)] || String(normalizedFormData.joint_annual_income);
       pdfData[mapped] = m.checked_value || 'On';
-      pdfData[m.pdf_field] = mapped;
+      // pdf_field is itself a bucket checkbox; writing the label there would uncheck it
+      if (pdfFieldTypes[m.pdf_field] !== 'Btn') {
+        pdfData[m.pdf_field] = mapped;
+      }
     }
   }
 
@@ -257,28 +266,28 @@ export async function fillKYCPDF(formData, otherCountries = [], otherInvestments
   // Handle dynamic arrays
   if (otherCountries.length > 0) {
     // Try to find a field for additional countries
-    const countryField = pdfFields.find(f => f.name.toLowerCase().includes('country') && f.name.toLowerCase().includes('other'));
+    const countryField = fallbackFields.other_countries;
     if (countryField) {
-      pdfData[countryField.name] = otherCountries.join(', ');
+      pdfData[countryField] = otherCountries.join(', ');
     } else {
       // Fallback: add to a generic "other" field if it exists
-      const otherField = pdfFields.find(f => f.name.toLowerCase().includes('other') && f.type === 'Tx');
+      const otherField = fallbackFields.other_text;
       if (otherField) {
-        pdfData[otherField.name] = `Additional countries: ${otherCountries.join(', ')}`;
+        pdfData[otherField] = `Additional countries: ${otherCountries.join(', ')}`;
       }
     }
   }
 
   if (otherInvestments.length > 0) {
     // Try to find a field for additional investments
-    const investmentField = pdfFields.find(f => f.name.toLowerCase().includes('investment') && f.name.toLowerCase().includes('other'));
+    const investmentField = fallbackFields.other_investments;
     if (investmentField) {
-      pdfData[investmentField.name] = otherInvestments.join(', ');
+      pdfData[investmentField] = otherInvestments.join(', ');
     } else {
       // Fallback: add to a generic "other" field if it exists
-      const otherField = pdfFields.find(f => f.name.toLowerCase().includes('other') && f.type === 'Tx');
-      if (otherField && !pdfData[otherField.name]) {
-        pdfData[otherField.name] = `Additional investments: ${otherInvestments.join(', ')}`;
+      const otherField = fallbackFields.other_text;
+      if (otherField && !pdfData[otherField]) {
+        pdfData[otherField] = `Additional investments: ${otherInvestments.join(', ')}`;
       }
     }
   }
@@ -1,6 +1,25 @@
 const LEVELS = { debug: 0, info: 1, warn: 2, error: 3 };
 const ENV_LEVEL = (typeof process !== 'undefined' && process.env && process.env.NODE_ENV === 'production') ? LEVELS.info : LEVELS.debug;
 
+// 'pretty' (default): multi-line console output for development.
+// 'compact': one JSON object per line ({time, level, message, meta, session, seq})
+// for shipping to a log collector; scripts/aggregate_logs.py reads it.
+// Set VITE_LOG_FORMAT=compact (or LOG_FORMAT in Node), or call logger.setFormat().
+function envFormat() {
+  try {
+    if (import.meta.env && import.meta.env.VITE_LOG_FORMAT) return import.meta.env.VITE_LOG_FORMAT;
+  } catch {
+    // not bundled by Vite
+  }
+  return (typeof process !== 'undefined' && process.env && process.env.LOG_FORMAT) || 'pretty';
+}
+
+let outputFormat = envFormat() === 'compact' ? 'compact' : 'pretty';
+
+// Identifies one page load so start/end events from concurrent users can be paired
+const SESSION = Math.random().toString(36).slice(2, 10);
+let seq = 0;
+
 function timestamp() {
   return new Date().toISOString();
 }
@@ -29,22 +48,47 @@ function prettyOutput(obj) {
   }
 }
 
+// Error objects have no enumerable fields; keep what identifies the failure
+function serializeValue(key, value) {
+  if (value instanceof Error) {
+    return { name: value.name, message: value.message, ...(value.code ? { code: value.code } : {}) };
+  }
+  return value;
+}
+
+function compactOutput(level, msg, meta) {
+  const record = { ...format(level, msg, meta), session: SESSION, seq: ++seq };
+  try {
+    return JSON.stringify(record, serializeValue);
+  } catch {
+    return JSON.stringify({ ...record, meta: String(meta) });
+  }
+}
+
+function emit(level, msg, meta) {
+  if (!shouldLog(level)) return;
+  if (outputFormat === 'compact') {
+    console[level](compactOutput(level, msg, meta));
+    return;
+  }
+  console[level](`[${level}]`, timestamp(), msg, meta ? '\n' + prettyOutput(meta) : '');
+}
+
 const logger = {
   debug(msg, meta) {
-    if (!shouldLog('debug')) return;
-    console.debug('[debug]', timestamp(), msg, meta ? '\n' + prettyOutput(meta) : '');
+    emit('debug', msg, meta);
   },
   info(msg, meta) {
-    if (!shouldLog('info')) return;
-    console.info('[info]', timestamp(), msg, meta ? '\n' + prettyOutput(meta) : '');
+    emit('info', msg, meta);
   },
   warn(msg, meta) {
-    if (!shouldLog('warn')) return;
-    console.warn('[warn]', timestamp(), msg, meta ? '\n' + prettyOutput(meta) : '');
+    emit('warn', msg, meta);
   },
   error(msg, meta) {
-    if (!shouldLog('error')) return;
-    console.error('[error]', timestamp(), msg, meta ? '\n' + prettyOutput(meta) : '');
+    emit('error', msg, meta);
+  },
+  setFormat(name) {
+    outputFormat = name === 'compact' ? 'compact' : 'pretty';
   },
 };
 